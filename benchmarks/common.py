@@ -0,0 +1,53 @@
+import statistics
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from fast_zero.app import create_app
+from fast_zero.database import build_engine, get_read_session, get_session
+from fast_zero.models import User, table_registry
+from fast_zero.settings import Settings
+
+
+def seed_users(path, total, password_hash='x', batch=50_000):
+    # inserção direta (sem passar pela API) para montar bases grandes rápido
+    engine = create_engine(f'sqlite:///{path}')
+    table_registry.metadata.create_all(engine)
+    with Session(engine) as session:
+        for start in range(0, total, batch):
+            rows = [
+                {'username': f'user{i}', 'email': f'user{i}@bench.com', 'password': password_hash}
+                for i in range(start + 1, min(start + batch, total) + 1)
+            ]
+            session.execute(insert(User), rows)
+        session.commit()
+    engine.dispose()
+
+
+def bench_engine(path, **settings):
+    return build_engine(Settings(DATABASE_URL=f'sqlite+aiosqlite:///{path}', **settings))
+
+
+def bench_app(path, **settings):
+    # app próprio, com as settings da base do benchmark: nada depende do .env do diretório
+    return create_app(Settings(DATABASE_URL=f'sqlite+aiosqlite:///{path}', **settings))
+
+
+def use_engine(app, engine):
+    async def get_session_override():
+        async with AsyncSession(engine, expire_on_commit=False) as session:
+            yield session
+
+    app.dependency_overrides[get_session] = get_session_override
+    app.dependency_overrides[get_read_session] = get_session_override
+
+
+def latency_summary(samples_ms):
+    cuts = statistics.quantiles(samples_ms, n=100, method='inclusive') if len(samples_ms) > 1 else samples_ms * 99
+    return {
+        'p50_ms': round(cuts[49], 3),
+        'p95_ms': round(cuts[94], 3),
+        'p99_ms': round(cuts[98], 3),
+        'mean_ms': round(statistics.fmean(samples_ms), 3),
+    }
@@ -0,0 +1,76 @@
+"""Fan-out do frontend: N GET /users/{id} concorrentes vs um GET /users/batch, com e sem coalescer.
+
+python -m benchmarks.fanout --users 50000 --fanout 50 --rounds 100
+"""
+
+import argparse
+import asyncio
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from httpx import ASGITransport, AsyncClient
+
+from benchmarks.common import bench_app, bench_engine, seed_users, use_engine
+
+
+async def fanout(client, ids):
+    responses = await asyncio.gather(*(client.get(f'/users/{user_id}') for user_id in ids))
+    return sum(int(response.headers['x-db-query-count']) for response in responses)
+
+
+async def batch(client, ids):
+    response = await client.get('/users/batch', params={'ids': ','.join(map(str, ids))})
+    return int(response.headers['x-db-query-count'])
+
+
+async def run(client, strategy, args):
+    # a consulta coalescida conta na requisição que abriu o lote: a soma é o total de SELECTs
+    queries = 0
+    start = time.perf_counter()
+    for _ in range(args.rounds):
+        queries += await strategy(client, random.sample(range(1, args.users + 1), args.fanout))
+    return (time.perf_counter() - start) / args.rounds * 1000, queries / args.rounds
+
+
+async def report(args, path):
+    app = bench_app(path, DEBUG=True)
+    engine = bench_engine(path, SLOW_QUERY_MS=60_000)
+    use_engine(app, engine)
+
+    print(f'{"estratégia":>22} {"ms/rodada":>10} {"SELECTs/rodada":>15}')
+    try:
+        for name, window_ms, strategy in (
+            ('individual, janela 0', 0, fanout),
+            (f'individual, janela {args.window_ms:g}', args.window_ms, fanout),
+            ('batch', 0, batch),
+        ):
+            app.state.settings.USER_LOADER_WINDOW_MS = window_ms
+            async with (
+                app.router.lifespan_context(app),
+                AsyncClient(transport=ASGITransport(app=app), base_url='http://bench') as client,
+            ):
+                elapsed_ms, queries = await run(client, strategy, args)
+            print(f'{name:>22} {elapsed_ms:>10.2f} {queries:>15.1f}')
+    finally:
+        app.dependency_overrides.clear()
+        await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=50_000)
+    parser.add_argument('--fanout', type=int, default=50, help='ids por rodada')
+    parser.add_argument('--rounds', type=int, default=100)
+    parser.add_argument('--window-ms', type=float, default=1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / 'bench.db'
+        seed_users(path, args.users)
+        asyncio.run(report(args, path))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+"""Latência de página: OFFSET vs cursor (keyset) em GET /users/.
+
+python -m benchmarks.pagination --users 200000
+"""
+
+import argparse
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+
+from benchmarks.common import bench_app, bench_engine, seed_users, use_engine
+from fast_zero.models import User
+from fast_zero.pagination import encode_cursor
+from fast_zero.security import get_current_reader
+
+
+def timed_page(client, params, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        response = client.get('/users/', params=params)
+        samples.append((time.perf_counter() - start) * 1000)
+        assert response.status_code == 200  # noqa: PLR2004
+    return statistics.median(samples)
+
+
+def report(client, args):
+    print(f'{"pagina":>8} {"offset (ms)":>12} {"cursor (ms)":>12}')
+    last_page = args.users // args.limit
+    pages = [10**i for i in range(len(str(last_page))) if 10**i < last_page] + [last_page]
+    for page in pages:
+        depth = (page - 1) * args.limit
+        marker = User(username='', email='', password='')
+        marker.id = depth
+        offset_ms = timed_page(client, {'limit': args.limit, 'offset': depth}, args.repeat)
+        cursor_ms = timed_page(client, {'limit': args.limit, 'cursor': encode_cursor(marker, 'id')}, args.repeat)
+        print(f'{page:>8} {offset_ms:>12.2f} {cursor_ms:>12.2f}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--users', type=int, default=200_000)
+    parser.add_argument('--limit', type=int, default=50)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / 'bench.db'
+        seed_users(path, args.users)
+        app = bench_app(path)
+        use_engine(app, bench_engine(path))
+        app.dependency_overrides[get_current_reader] = lambda: None
+        with TestClient(app) as client:
+            report(client, args)
+        app.dependency_overrides.clear()
+
+
+if __name__ == '__main__':
+    main()
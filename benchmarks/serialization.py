@@ -0,0 +1,71 @@
+"""Requisições/s em GET /users/: caminho validado (UserList) vs FAST_RESPONSES (orjson + tuplas).
+
+python -m benchmarks.serialization --users 50000 --requests 300
+"""
+
+import argparse
+import asyncio
+import tempfile
+import time
+from pathlib import Path
+
+from httpx import ASGITransport, AsyncClient
+
+from benchmarks.common import bench_app, bench_engine, seed_users, use_engine
+from fast_zero.security import get_current_reader
+
+LIMITS = (10, 100, 1000)
+
+
+async def throughput(client, limit, args):
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def one(offset):
+        async with semaphore:
+            response = await client.get('/users/', params={'limit': limit, 'offset': offset})
+            response.raise_for_status()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i * limit % max(args.users - limit, 1)) for i in range(args.requests)))
+    return args.requests / (time.perf_counter() - start)
+
+
+async def report(args, path):
+    app = bench_app(path)
+    engine = bench_engine(path, SLOW_QUERY_MS=60_000)
+    use_engine(app, engine)
+    app.dependency_overrides[get_current_reader] = lambda: None
+
+    print(f'{"limit":>6} {"validado (req/s)":>17} {"rápido (req/s)":>15} {"ganho":>6}')
+    try:
+        async with (
+            app.router.lifespan_context(app),
+            AsyncClient(transport=ASGITransport(app=app), base_url='http://bench') as client,
+        ):
+            for limit in LIMITS:
+                results = []
+                for fast in (False, True):
+                    app.state.settings.FAST_RESPONSES = fast
+                    results.append(await throughput(client, limit, args))
+                validated, fast = results
+                print(f'{limit:>6} {validated:>17.0f} {fast:>15.0f} {fast / validated:>5.1f}x')
+    finally:
+        app.dependency_overrides.clear()
+        await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=50_000)
+    parser.add_argument('--requests', type=int, default=300, help='requisições por limite e caminho')
+    parser.add_argument('--concurrency', type=int, default=8)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / 'bench.db'
+        seed_users(path, args.users)
+        asyncio.run(report(args, path))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""Tempo de import de fast_zero.app e de startup (create_app + lifespan), contra um orçamento.
+
+python -m benchmarks.startup --runs 7 --import-budget-ms 1000 --startup-budget-ms 150
+python -m benchmarks.startup --profile  # módulos mais caros no import (python -X importtime)
+
+Cada medida roda num interpretador novo, como um container frio. Sai com status 1 se
+a mediana passar do orçamento (serve de checagem no CI).
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+PROBE = """
+import asyncio, json, time
+start = time.perf_counter()
+from fast_zero.app import create_app
+imported = time.perf_counter()
+
+async def main():
+    app = create_app()
+    async with app.router.lifespan_context(app):
+        return time.perf_counter()
+
+ready = asyncio.run(main())
+print(json.dumps({'import_ms': (imported - start) * 1000, 'startup_ms': (ready - imported) * 1000}))
+"""
+
+
+def measure(runs):
+    samples = [json.loads(subprocess.run([sys.executable, '-c', PROBE], capture_output=True, text=True, check=True).stdout) for _ in range(runs)]
+    return {key: statistics.median(sample[key] for sample in samples) for key in ('import_ms', 'startup_ms')}
+
+
+def profile(top):
+    # linhas "import time: self | cumulative | pacote" no stderr
+    stderr = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import fast_zero.app'], capture_output=True, text=True, check=True).stderr
+    rows = []
+    for line in stderr.splitlines()[1:]:
+        _, self_us, cumulative_us, name = (part.strip() for part in line.replace('import time:', '|').split('|'))
+        rows.append((int(cumulative_us), int(self_us), name))
+    print(f'{"cumulativo (ms)":>16} {"próprio (ms)":>13}  módulo')
+    for cumulative_us, self_us, name in sorted(rows, reverse=True)[:top]:
+        print(f'{cumulative_us / 1000:>16.1f} {self_us / 1000:>13.1f}  {name}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=7)
+    parser.add_argument('--import-budget-ms', type=float, default=1000)
+    parser.add_argument('--startup-budget-ms', type=float, default=150)
+    parser.add_argument('--profile', action='store_true', help='lista os imports mais caros e sai')
+    parser.add_argument('--top', type=int, default=20)
+    args = parser.parse_args()
+
+    if args.profile:
+        profile(args.top)
+        return
+
+    result = measure(args.runs)
+    budgets = {'import_ms': args.import_budget_ms, 'startup_ms': args.startup_budget_ms}
+    print(f'{"etapa":>10} {"mediana (ms)":>13} {"orçamento (ms)":>15}')
+    for key, budget in budgets.items():
+        status = 'ok' if result[key] <= budget else 'ESTOURADO'
+        print(f'{key.removesuffix("_ms"):>10} {result[key]:>13.1f} {budget:>15.0f}  {status}')
+    sys.exit(0 if all(result[key] <= budget for key, budget in budgets.items()) else 1)
+
+
+if __name__ == '__main__':
+    main()
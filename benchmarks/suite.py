@@ -0,0 +1,178 @@
+"""Carga e latência de todos os endpoints de usuário contra o app ASGI real.
+
+python -m benchmarks.suite --users 1000000 --requests 2000 --concurrency 32 --output bench.json
+python -m benchmarks.suite --compare bench.json  # roda de novo e mostra a diferença
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import random
+import subprocess
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from httpx import ASGITransport, AsyncClient
+
+from benchmarks.common import bench_app, bench_engine, latency_summary, seed_users, use_engine
+from fast_zero.hashing import get_password_hash
+from fast_zero.security import create_access_token
+
+PASSWORD = 'bench-password'
+
+
+def scenarios(total):
+    # PUT e DELETE consomem usuários distintos: cada um escreve/apaga uma vez
+    writable = iter(range(1, total + 1))
+
+    def list_users():
+        return 'GET', '/users/', {'params': {'limit': 50, 'offset': random.randrange(total)}}
+
+    def get_user():
+        return 'GET', f'/users/{random.randint(1, total)}', {}
+
+    def token():
+        return 'POST', '/token', {'data': {'username': f'user{random.randint(1, total)}@bench.com', 'password': PASSWORD}}
+
+    def update_user():
+        user_id = next(writable)
+        email = f'user{user_id}@bench.com'
+        return (
+            'PUT',
+            f'/users/{user_id}',
+            {
+                'headers': {'Authorization': f'Bearer {create_access_token({"sub": email})}'},
+                'json': {'username': f'user{user_id}', 'email': email, 'password': PASSWORD},
+            },
+        )
+
+    def delete_user():
+        user_id = next(writable)
+        token = create_access_token({'sub': f'user{user_id}@bench.com'})
+        return 'DELETE', f'/users/{user_id}', {'headers': {'Authorization': f'Bearer {token}'}}
+
+    reader = create_access_token({'sub': 'user1@bench.com'})
+    auth = {'Authorization': f'Bearer {reader}'}
+
+    def with_auth(build):
+        def request():
+            method, url, kwargs = build()
+            return method, url, {**kwargs, 'headers': auth}
+
+        return request
+
+    return {
+        'list_users': with_auth(list_users),
+        'get_user': get_user,
+        'token': token,
+        'update_user': update_user,
+        'delete_user': delete_user,
+    }
+
+
+async def drive(client, build, requests, concurrency):
+    samples, errors = [], 0
+    semaphore = asyncio.Semaphore(concurrency)
+    # monta as requisições antes para não medir a geração de tokens
+    prepared = [build() for _ in range(requests)]
+
+    async def one(method, url, kwargs):
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.request(method, url, **kwargs)
+            samples.append((time.perf_counter() - start) * 1000)
+            if response.is_error:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(*request) for request in prepared))
+    elapsed = time.perf_counter() - start
+    return {'requests': requests, 'errors': errors, 'throughput_rps': round(requests / elapsed, 1), **latency_summary(samples)}
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(report, baseline):
+    print(f'{"cenário":<12} {"rps":>18} {"p95 (ms)":>20} {"p99 (ms)":>20}')
+    for name, current in report['scenarios'].items():
+        previous = baseline['scenarios'].get(name)
+        if not previous:
+            continue
+        cells = [
+            f'{previous[key]:>8} → {current[key]:<8}' if key == 'throughput_rps' else f'{previous[key]:>9} → {current[key]:<9}'
+            for key in ('throughput_rps', 'p95_ms', 'p99_ms')
+        ]
+        print(f'{name:<12} ' + ' '.join(cells))
+
+
+async def run(args, path):
+    if args.database is None:
+        seed_users(path, args.users, password_hash=get_password_hash(PASSWORD))
+    app = bench_app(path)
+    engine = bench_engine(path)
+    use_engine(app, engine)
+
+    report = {
+        'meta': {
+            'revision': git_revision(),
+            'timestamp': datetime.now(tz=timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'users': args.users,
+            'requests': args.requests,
+            'concurrency': args.concurrency,
+        },
+        'scenarios': {},
+    }
+    transport = ASGITransport(app=app)
+    try:
+        # ASGITransport não dispara o lifespan: sem ele não há hasher nem caches em app.state
+        async with app.router.lifespan_context(app), AsyncClient(transport=transport, base_url='http://bench') as client:
+            for name, build in scenarios(args.users).items():
+                if args.only and name not in args.only:
+                    continue
+                report['scenarios'][name] = await drive(client, build, args.requests, args.concurrency)
+    finally:
+        app.dependency_overrides.clear()
+        await engine.dispose()
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=100_000, help='usuários semeados na base')
+    parser.add_argument('--requests', type=int, default=1000, help='requisições por cenário')
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--only', nargs='*', help='cenários a rodar (padrão: todos)')
+    parser.add_argument('--database', type=Path, help='reaproveita uma base já semeada (é alterada por PUT/DELETE)')
+    parser.add_argument('--output', type=Path, help='grava o relatório JSON neste arquivo')
+    parser.add_argument('--compare', type=Path, help='relatório JSON anterior para comparar')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    if args.requests * 2 > args.users:
+        parser.error('--users precisa ser pelo menos 2x --requests (PUT e DELETE usam usuários distintos)')
+    random.seed(args.seed)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        report = asyncio.run(run(args, args.database or Path(tmp) / 'bench.db'))
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        args.output.write_text(output + '\n', encoding='utf-8')
+    else:
+        print(output)
+    if args.compare:
+        compare(report, json.loads(args.compare.read_text(encoding='utf-8')))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+"""Round trips e vazão das escritas de usuário: SELECT + escrita + refresh vs ... RETURNING.
+
+python -m benchmarks.write_path --writers 16 --writes 200
+
+Sem hashing (senha fixa): mede só o caminho no banco dos handlers de app.py.
+"""
+
+import argparse
+import asyncio
+import tempfile
+import time
+from pathlib import Path
+
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from benchmarks.common import bench_engine, seed_users
+from fast_zero.models import User
+from fast_zero.querylog import QueryStats, current_stats
+
+
+async def legacy_create(session, username):
+    if await session.scalar(select(User).where((User.username == username) | (User.email == f'{username}@bench.com'))):
+        raise RuntimeError(username)
+    user = User(username=username, email=f'{username}@bench.com', password='x')
+    session.add(user)
+    await session.commit()
+    await session.refresh(user)
+    return user
+
+
+async def legacy_update(session, user_id):
+    user = await session.get(User, user_id)
+    user.username = f'{user.username}-v2'
+    await session.commit()
+    await session.refresh(user)
+    return user
+
+
+async def legacy_delete(session, user_id):
+    user = await session.scalar(select(User).where(User.id == user_id))
+    await session.delete(user)
+    await session.commit()
+
+
+async def returning_create(session, username):
+    user = await session.scalar(insert(User).values(username=username, email=f'{username}@bench.com', password='x').returning(User))
+    await session.commit()
+    return user
+
+
+async def returning_update(session, user_id):
+    user = await session.scalar(update(User).where(User.id == user_id).values(username=User.username + '-v2').returning(User))
+    await session.commit()
+    return user
+
+
+async def returning_delete(session, user_id):
+    await session.scalar(delete(User).where(User.id == user_id).returning(User.email))
+    await session.commit()
+
+
+STRATEGIES = {
+    'legacy': {'create': legacy_create, 'update': legacy_update, 'delete': legacy_delete},
+    'returning': {'create': returning_create, 'update': returning_update, 'delete': returning_delete},
+}
+
+
+async def drive(engine, operation, arguments, writers):
+    stats = QueryStats()
+    queue = iter(arguments)
+
+    async def writer():
+        current_stats.set(stats)
+        for argument in queue:
+            async with AsyncSession(engine, expire_on_commit=False) as session:
+                await operation(session, argument)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(writer() for _ in range(writers)))
+    elapsed = time.perf_counter() - start
+    return stats.count / len(arguments), len(arguments) / elapsed
+
+
+async def run_strategy(path, name, args):
+    # a contenção de escrita deixaria o log de queries lentas ilegível
+    engine = bench_engine(path, DB_POOL_SIZE=args.writers, SLOW_QUERY_MS=60_000)
+    operations = STRATEGIES[name]
+    # cada estratégia roda na sua própria base: update/delete usam os ids semeados
+    workload = {
+        'create': [f'{name}-{i}' for i in range(args.writes)],
+        'update': range(1, args.writes + 1),
+        'delete': range(1, args.writes + 1),
+    }
+    rows = [(operation, *await drive(engine, operations[operation], arguments, args.writers)) for operation, arguments in workload.items()]
+    await engine.dispose()
+    return rows
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--writers', type=int, default=16)
+    parser.add_argument('--writes', type=int, default=200, help='operações por tipo de escrita')
+    args = parser.parse_args()
+
+    print(f'{"estratégia":>10} {"operação":>8} {"queries/op":>11} {"ops/s":>9}')
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in STRATEGIES:
+            path = Path(tmp) / f'{name}.db'
+            seed_users(path, args.writes)
+            for operation, queries, throughput in await run_strategy(path, name, args):
+                print(f'{name:>10} {operation:>8} {queries:>11.1f} {throughput:>9.0f}')
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,60 @@
+"""Escritas concorrentes no SQLite: PRAGMAs padrão vs configuração de produção.
+
+python -m benchmarks.write_throughput --writers 16 --writes 200
+"""
+
+import argparse
+import asyncio
+import tempfile
+import time
+from pathlib import Path
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from fast_zero.database import build_engine
+from fast_zero.models import User, table_registry
+from fast_zero.settings import Settings
+
+PROFILES = {
+    # o que o SQLite faz sem configuração
+    'default': {'SQLITE_JOURNAL_MODE': 'DELETE', 'SQLITE_SYNCHRONOUS': 'FULL', 'SQLITE_CACHE_SIZE': -2000, 'SQLITE_MMAP_SIZE': 0},
+    'tuned': {},
+}
+
+
+async def writer(engine, writer_id, writes):
+    for i in range(writes):
+        async with AsyncSession(engine) as session:
+            await session.execute(insert(User).values(username=f'w{writer_id}-{i}', email=f'w{writer_id}-{i}@bench.com', password='x'))
+            await session.commit()
+
+
+async def run_profile(path, overrides, args):
+    settings = Settings(DATABASE_URL=f'sqlite+aiosqlite:///{path}', DB_POOL_SIZE=args.writers, **overrides)
+    engine = build_engine(settings)
+    async with engine.begin() as conn:
+        await conn.run_sync(table_registry.metadata.create_all)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(writer(engine, n, args.writes) for n in range(args.writers)))
+    elapsed = time.perf_counter() - start
+    await engine.dispose()
+    return args.writers * args.writes / elapsed
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--writers', type=int, default=16)
+    parser.add_argument('--writes', type=int, default=200)
+    args = parser.parse_args()
+
+    print(f'{"perfil":>8} {"escritas/s":>12}')
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, overrides in PROFILES.items():
+            throughput = await run_profile(Path(tmp) / f'{name}.db', overrides, args)
+            print(f'{name:>8} {throughput:>12.0f}')
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
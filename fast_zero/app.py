@@ -1,22 +1,45 @@
+from contextlib import asynccontextmanager
 from http import HTTPStatus
+from typing import Annotated, Literal
 
-from fastapi import Depends, FastAPI, HTTPException
-from fastapi.responses import HTMLResponse
+from fastapi import APIRouter, Depends, FastAPI, HTTPException, Query, Request, Response
+from fastapi.responses import HTMLResponse, JSONResponse, ORJSONResponse, PlainTextResponse, StreamingResponse
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy import select
+from sqlalchemy import delete, func, insert, select, update
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from fast_zero.database import get_session
-from fast_zero.models import User
+from fast_zero.cache import CacheBackend
+from fast_zero.changes import decode_position, read_changes, since_position
+from fast_zero.conditional import is_conditional, is_not_modified, not_modified, page_validators, user_validators
+from fast_zero.database import PIN_PRIMARY_COOKIE, build_session_router, get_read_session, get_session, pin_to_primary
+from fast_zero.export import MEDIA_TYPES, stream_users
+from fast_zero.hashing import HashingExecutor, argon2_costs
+from fast_zero.loader import UserLoader
+from fast_zero.metrics import MetricsMiddleware, render_metrics
+from fast_zero.models import User, user_deletions
+from fast_zero.pagination import encode_cursor, paginate_users, total_users
+from fast_zero.querylog import QueryStatsMiddleware
+from fast_zero.ratelimit import build_login_throttle, login_throttled, throttle_keys
+from fast_zero.responses import PUBLIC_FIELDS, public_columns, public_row, sparse_fields
 from fast_zero.schemas import (
+    FieldSelection,
+    FilterPage,
     JWToken,
     Message,
+    UserBatch,
+    UserBatchQuery,
+    UserBulkList,
+    UserChanges,
+    UserChangesQuery,
     UserList,
     UserPublic,
     UserSchema,
+    UserSearch,
 )
-from fast_zero.security import create_access_token, get_current_user, get_password_hash, verify_password
+from fast_zero.search import search_users
+from fast_zero.security import build_auth_caches, create_access_token, get_current_reader, get_current_user
+from fast_zero.settings import Settings
 
 database = [
     # UserPublic(id=1, username='Maria', email='maria@gmail.com'),
@@ -26,15 +49,51 @@ database = [
     # UserPublic(id=5, username='Felipe', email='maria@gmail.com'),
 ]
 
-app = FastAPI(title='Minha API TOP')
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # pools, processos de hash e caches nascem aqui, em cada worker: nada criado no import
+    # nem compartilhado entre forks
+    settings = app.state.settings
+    app.state.db = build_session_router(settings)
+    app.state.hasher = HashingExecutor(settings.HASH_WORKERS, settings.HASH_QUEUE_SIZE, argon2_costs(settings))
+    app.state.cache_backend = CacheBackend(settings)
+    app.state.user_cache, app.state.token_cache = build_auth_caches(settings, app.state.cache_backend)
+    app.state.read_cache = app.state.cache_backend.cache('users', settings.READ_CACHE_MAXSIZE, settings.READ_CACHE_TTL_SECONDS)
+    app.state.login_throttle = build_login_throttle(settings)
+    app.state.user_loader = UserLoader(settings.USER_LOADER_WINDOW_MS / 1000)
+    try:
+        yield
+    finally:
+        app.state.hasher.shutdown()
+        await app.state.cache_backend.close()
+        await app.state.db.dispose()
+
+
+async def _conflict_detail(session: AsyncSession, user: UserSchema):
+    # só no caminho de erro: o banco reporta uma violação só, e username tem prioridade
+    await session.rollback()
+    if await session.scalar(select(User.id).where(User.username == user.username)):
+        return 'Username already exists'
+    return 'Email already exists'
+
+
+async def _invalidate_user(state, user_id: int, email: str):
+    # com backend compartilhado vale para todos os workers de uma vez; a troca de geração
+    # descarta o set de uma leitura que começou antes da escrita e termina depois dela
+    await state.user_cache.invalidate(email)
+    await state.read_cache.invalidate(user_id)
 
-@app.get('/', status_code=HTTPStatus.OK, response_model=Message)
+
+api = APIRouter()
+
+
+@api.get('/', status_code=HTTPStatus.OK, response_model=Message)
 def read_root():
     return {'message': 'Olá mundo!'}
 
 
-@app.get('/html/', status_code=HTTPStatus.OK, response_class=HTMLResponse)
+@api.get('/html/', status_code=HTTPStatus.OK, response_class=HTMLResponse)
 def read_html():
     return """
 
@@ -48,98 +107,350 @@ def read_html():
     <html>"""
 
 
-@app.post('/users/', status_code=HTTPStatus.CREATED, response_model=UserPublic)
-def create_user(user: UserSchema, session=Depends(get_session)):
-    user_db = session.scalar(select(User).where((User.username == user.username) | (User.email == user.email)))
-    if user_db:
-        if user_db.username == user.username:
+@api.get('/metrics', response_class=PlainTextResponse, include_in_schema=False)
+def metrics():
+    return PlainTextResponse(render_metrics(), media_type='text/plain; version=0.0.4')
+
+
+@api.post('/users/', status_code=HTTPStatus.CREATED, response_model=UserPublic, dependencies=[Depends(pin_to_primary)])
+async def create_user(user: UserSchema, request: Request, session: AsyncSession = Depends(get_session)):
+    # um único INSERT ... RETURNING: a unicidade fica a cargo do banco
+    try:
+        user_db = await session.scalar(
+            insert(User).values(username=user.username, email=user.email, password=await request.app.state.hasher.hash(user.password)).returning(User)
+        )
+        await session.commit()
+    except IntegrityError:
+        raise HTTPException(detail=await _conflict_detail(session, user), status_code=HTTPStatus.CONFLICT)
+
+    return user_db
+
+
+@api.post('/users/bulk', status_code=HTTPStatus.OK, response_model=UserBulkList, dependencies=[Depends(pin_to_primary)])
+async def create_users_bulk(
+    users: list[UserSchema],
+    request: Request,
+    session: AsyncSession = Depends(get_session),
+    current_user: User = Depends(get_current_user),
+):
+    settings = request.app.state.settings
+    if len(users) > settings.BULK_MAX_USERS:
+        raise HTTPException(
+            status_code=HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+            detail=f'At most {settings.BULK_MAX_USERS} users per request',
+        )
+
+    # uma única consulta IN para todos os conflitos com o banco; email sem diferenciar
+    # maiúsculas, como em ix_users_email_lower
+    existing = await session.execute(
+        select(User.username, User.email).where(
+            User.username.in_({user.username for user in users}) | func.lower(User.email).in_({user.email.lower() for user in users})
+        )
+    )
+    usernames, emails = set(), set()
+    for username, email in existing:
+        usernames.add(username)
+        emails.add(email.lower())
+
+    results, new_users = [], []
+    for user in users:
+        result = {'username': user.username, 'email': user.email, 'status': 'conflict'}
+        if user.username in usernames:
+            result['detail'] = 'Username already exists'
+        elif user.email.lower() in emails:
+            result['detail'] = 'Email already exists'
+        else:
+            result['status'] = 'created'
+            usernames.add(user.username)
+            emails.add(user.email.lower())
+            new_users.append((user, result))
+        results.append(result)
+
+    if new_users:
+        hashes = await request.app.state.hasher.hash_many([user.password for user, _ in new_users])
+        rows = [{'username': user.username, 'email': user.email, 'password': hashed} for (user, _), hashed in zip(new_users, hashes)]
+        try:
+            ids = await session.scalars(insert(User).returning(User.id, sort_by_parameter_order=True), rows)
+            await session.commit()
+        except IntegrityError:
             raise HTTPException(
-                detail='Username already exists',
+                detail='Username or Email already exists',
                 status_code=HTTPStatus.CONFLICT,
             )
-        elif user_db.email == user.email:
-            raise HTTPException(detail='Email already exists', status_code=HTTPStatus.CONFLICT)
+        for (_, result), user_id in zip(new_users, ids.all()):
+            result['id'] = user_id
 
-    user_db = User(
-        username=user.username,
-        email=user.email,
-        password=get_password_hash(user.password),
-    )
+    return {'results': results}
 
-    session.add(user_db)
-    session.commit()
-    session.refresh(user_db)
 
-    return user_db
+@api.get('/users/', status_code=HTTPStatus.OK, response_model=UserList)
+async def get_users(
+    page: Annotated[FilterPage, Query()],
+    request: Request,
+    response: Response,
+    session: AsyncSession = Depends(get_read_session),
+    current_user=Depends(get_current_reader),
+):
+    settings = request.app.state.settings
+    fields = sparse_fields(page.fields)
+    total = await total_users(session) if page.include_total else None
+
+    if is_conditional(request):
+        # só (id, updated_at) da página: cliente em polling não carrega as linhas
+        versions = (await session.execute(paginate_users(select(User.id, User.updated_at), page))).all()
+        validators = page_validators(versions, total, fields)
+        if is_not_modified(request, validators):
+            return not_modified(validators)
+
+    # com ?fields= ou no caminho rápido, só as colunas pedidas saem do banco
+    by_columns = settings.FAST_RESPONSES or fields is not None
+    columns = public_columns(page.order_by, fields) if by_columns else (User,)
+    result = await session.execute(paginate_users(select(*columns), page))
+    users_db = result.all() if by_columns else result.scalars().all()
+
+    next_cursor = None
+    if users_db and len(users_db) == page.limit:
+        next_cursor = encode_cursor(users_db[-1], page.order_by)
+
+    validators = page_validators(users_db, total, fields)
+    if by_columns:
+        content = {'users': [public_row(row, fields) for row in users_db], 'next_cursor': next_cursor, 'total': total}
+        # objetos parciais não cabem no UserPublic: o corpo sai direto, sem response_model
+        response_class = ORJSONResponse if settings.FAST_RESPONSES else JSONResponse
+        return response_class(content, headers=validators)
+    response.headers.update(validators)
+    return {'users': users_db, 'next_cursor': next_cursor, 'total': total}
+
+
+@api.get('/users/search', status_code=HTTPStatus.OK, response_model=UserList)
+async def search_users_endpoint(
+    search: Annotated[UserSearch, Query()],
+    request: Request,
+    session: AsyncSession = Depends(get_read_session),
+    current_user=Depends(get_current_reader),
+):
+    settings = request.app.state.settings
+    columns = public_columns() if settings.FAST_RESPONSES else (User,)
+    query = search_users(select(*columns), search.q, session.bind.dialect.name)
+    result = await session.execute(query.offset(search.offset).limit(search.limit))
+
+    if settings.FAST_RESPONSES:
+        return ORJSONResponse({'users': [public_row(row) for row in result], 'next_cursor': None, 'total': None})
+    return {'users': result.scalars().all()}
 
 
-@app.get('/users/', status_code=HTTPStatus.OK, response_model=UserList)
-def get_users(limit: int = 10, offset: int = 0, session: Session = Depends(get_session), current_user=Depends(get_current_user)):
-    users_db = session.scalars(select(User).limit(limit).offset(offset))
+@api.get('/users/batch', status_code=HTTPStatus.OK, response_model=UserBatch)
+async def get_users_batch(
+    batch: Annotated[UserBatchQuery, Query()],
+    request: Request,
+    session: AsyncSession = Depends(get_read_session),
+):
+    settings = request.app.state.settings
+    ids = list(dict.fromkeys(batch.ids))
+    if len(ids) > settings.BATCH_MAX_IDS:
+        raise HTTPException(
+            status_code=HTTPStatus.UNPROCESSABLE_ENTITY,
+            detail=f'At most {settings.BATCH_MAX_IDS} ids per request',
+        )
+
+    # um único SELECT ... IN; a resposta segue a ordem pedida
+    rows = {row.id: row for row in await session.execute(select(*public_columns()).where(User.id.in_(ids)))}
+    content = {
+        'users': [public_row(rows[user_id]) for user_id in ids if user_id in rows],
+        'missing': [user_id for user_id in ids if user_id not in rows],
+    }
+    if settings.FAST_RESPONSES:
+        return ORJSONResponse(content)
+    return content
+
+
+@api.get('/users/changes', status_code=HTTPStatus.OK, response_model=UserChanges)
+async def get_user_changes(
+    feed: Annotated[UserChangesQuery, Query()],
+    request: Request,
+    session: AsyncSession = Depends(get_read_session),
+    current_user=Depends(get_current_reader),
+):
+    # só o que mudou depois do cursor (ou de ?since=); sem nenhum dos dois, desde o começo
+    settings = request.app.state.settings
+    if feed.cursor:
+        position = decode_position(feed.cursor)
+    else:
+        position = since_position(feed.since) if feed.since else None
+    lag = settings.CHANGES_LAG_SECONDS
+    if session.bind.dialect.name == 'sqlite':
+        # updated_at é carimbado antes da espera pela trava de escrita, que vai até busy_timeout:
+        # um commit que esperou mais que o lag entraria atrás de um cursor já entregue
+        lag += settings.SQLITE_BUSY_TIMEOUT_MS / 1000
+    changes = await read_changes(session, position, feed.limit, lag=lag)
+
+    if settings.FAST_RESPONSES:
+        return ORJSONResponse(changes)
+    return changes
 
-    return {'users': users_db}
 
+@api.get('/users/export', status_code=HTTPStatus.OK, response_class=StreamingResponse)
+async def export_users(
+    export_format: Literal['ndjson', 'csv'] = Query('ndjson', alias='format'),
+    session: AsyncSession = Depends(get_read_session),
+    current_user: User = Depends(get_current_reader),
+):
+    return StreamingResponse(
+        stream_users(session.bind, export_format),
+        media_type=MEDIA_TYPES[export_format],
+        headers={'Content-Disposition': f'attachment; filename=users.{export_format}'},
+    )
 
-@app.put('/users/{user_id}', status_code=HTTPStatus.OK, response_model=UserPublic)
-def update_user(
+
+@api.put('/users/{user_id}', status_code=HTTPStatus.OK, response_model=UserPublic, dependencies=[Depends(pin_to_primary)])
+async def update_user(
     user_id: int,
     user: UserSchema,
-    session: Session = Depends(get_session),
+    request: Request,
+    session: AsyncSession = Depends(get_session),
     current_user: User = Depends(get_current_user),
 ):
     if current_user.id != user_id:
         raise HTTPException(status_code=HTTPStatus.FORBIDDEN, detail='Not enough permissions')
 
+    subject_email = current_user.email
     try:
-        # validação
-        current_user.email = user.email
-        current_user.username = user.username
-        current_user.password = get_password_hash(user.password)
-
-        session.add(current_user)
-        session.commit()
-        session.refresh(current_user)
-
-        return current_user
+        user_db = await session.scalar(
+            update(User)
+            .where(User.id == user_id)
+            .values(email=user.email, username=user.username, password=await request.app.state.hasher.hash(user.password))
+            .returning(User)
+        )
+        await session.commit()
     except IntegrityError:
         raise HTTPException(
             detail='Username or Email already exists',
             status_code=HTTPStatus.CONFLICT,
         )
+    await _invalidate_user(request.app.state, user_id, subject_email)
+    if user_db is None:
+        raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail='User not found')
+
+    return user_db
 
 
-@app.delete('/users/{user_id}', status_code=HTTPStatus.OK, response_model=Message)
-def delete_user(user_id: int, session: Session = Depends(get_session), current_user: User = Depends(get_current_user)):
-    user = session.scalar(select(User).where(User.id == user_id))
-    if not user:
-        raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail='User not found')
+@api.delete('/users/{user_id}', status_code=HTTPStatus.OK, response_model=Message, dependencies=[Depends(pin_to_primary)])
+async def delete_user(
+    user_id: int,
+    request: Request,
+    session: AsyncSession = Depends(get_session),
+    current_user: User = Depends(get_current_user),
+):
     if current_user.id != user_id:
+        # só o caminho de erro precisa saber se o alvo existe (404 vs 403)
+        if await session.scalar(select(User.id).where(User.id == user_id)) is None:
+            raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail='User not found')
         raise HTTPException(status_code=HTTPStatus.FORBIDDEN, detail='Not enough permissions')
-    session.delete(user)
-    session.commit()
+
+    email = await session.scalar(delete(User).where(User.id == user_id).returning(User.email))
+    if email is not None:
+        # tombstone para GET /users/changes, no mesmo commit do DELETE
+        await session.execute(insert(user_deletions).values(user_id=user_id))
+    await session.commit()
+    if email is None:
+        raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail='User not found')
+    await _invalidate_user(request.app.state, user_id, email)
     return {'message': 'User deleted'}
 
 
-@app.get('/users/{user_id}', response_model=UserPublic)
-def get_user(user_id: int, session: Session = Depends(get_session)):
-    user_db = session.scalar(select(User).where(User.id == user_id))
-    if user_db is None:
-        raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail='Usuário não encontrado')
+@api.get('/users/{user_id}', response_model=UserPublic)
+async def get_user(
+    user_id: int,
+    selection: Annotated[FieldSelection, Query()],
+    request: Request,
+    response: Response,
+    session: AsyncSession = Depends(get_read_session),
+):
+    state = request.app.state
+    fields = sparse_fields(selection.fields)
+    # pinado no primário logo depois de uma escrita: o cache pode não ter visto a invalidação
+    use_cache = PIN_PRIMARY_COOKIE not in request.cookies
+    user = await state.read_cache.get(user_id) if use_cache else None
+    if user is None:
+        if is_conditional(request):
+            # condicional sem cache: só updated_at decide o 304, sem carregar a linha
+            updated_at = await session.scalar(select(User.updated_at).where(User.id == user_id))
+            if updated_at is None:
+                raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail='Usuário não encontrado')
+            validators = user_validators(user_id, updated_at, fields)
+            if is_not_modified(request, validators):
+                return not_modified(validators)
+        # réplica pode estar atrás do primário: só leituras do primário abastecem o cache
+        fill_cache = use_cache and state.read_cache.enabled and session.bind not in state.db.replicas
+        # buscas concorrentes (mesmo id ou não) dividem um SELECT ... IN das colunas públicas.
+        # Pinado ou abastecendo o cache, só um SELECT que ainda não começou serve
+        row, generation = await state.user_loader.load(
+            session.bind, user_id, cache=state.read_cache if fill_cache else None, fresh=fill_cache or not use_cache
+        )
+        if row is None:
+            raise HTTPException(status_code=HTTPStatus.NOT_FOUND, detail='Usuário não encontrado')
+        user = {**public_row(row), 'updated_at': row.updated_at}
+        if fill_cache and generation is not None:
+            await state.read_cache.set(user_id, user, generation=generation)
 
-    return user_db
+    validators = user_validators(user_id, user['updated_at'], fields)
+    if is_not_modified(request, validators):
+        return not_modified(validators)
+    content = {field: user[field] for field in fields or PUBLIC_FIELDS}
+    if state.settings.FAST_RESPONSES:
+        return ORJSONResponse(content, headers=validators)
+    if fields is not None:
+        return JSONResponse(content, headers=validators)
+
+    response.headers.update(validators)
+    return content
 
 
-@app.post('/token', response_model=JWToken)
-def login_for_access_token(
+@api.post('/token', response_model=JWToken)
+async def login_for_access_token(
+    request: Request,
     form_data: OAuth2PasswordRequestForm = Depends(),
-    session: Session = Depends(get_session),
+    session: AsyncSession = Depends(get_session),
 ):
-    user = session.scalar(select(User).where(User.email == form_data.username))
-    if not user:
-        raise HTTPException(status_code=HTTPStatus.UNAUTHORIZED, detail='Incorrect email or password')
+    # bloqueio decidido, e a tentativa reservada, antes de qualquer consulta ou hash
+    state = request.app.state
+    keys = throttle_keys(form_data.username, request.client.host if request.client else None, state.settings)
+    retry_after = state.login_throttle.reserve(keys)
+    if retry_after:
+        login_throttled.inc()
+        raise HTTPException(
+            status_code=HTTPStatus.TOO_MANY_REQUESTS,
+            detail='Too many login attempts, try again later',
+            headers={'Retry-After': str(retry_after)},
+        )
 
-    if not verify_password(form_data.password, user.password):
+    try:
+        # email sem diferenciar maiúsculas: ix_users_email_lower é único, no máximo uma linha
+        user = await session.scalar(select(User).where(func.lower(User.email) == form_data.username.strip().lower()))
+        valid, updated_hash = await state.hasher.verify_and_update(form_data.password, user.password) if user else (False, None)
+    except BaseException:
+        # 503 do hasher, erro de banco ou cliente que desistiu não são senha errada
+        state.login_throttle.release(keys)
+        raise
+    if not valid:
+        state.login_throttle.failure(keys)
         raise HTTPException(status_code=HTTPStatus.UNAUTHORIZED, detail='Incorrect email or password')
+    state.login_throttle.success(keys)
+
+    # custos do Argon2 mudaram: regrava o hash agora, que temos a senha em claro. Só a coluna
+    # password: o usuário não mudou, então updated_at (ETag, /users/changes) fica como está
+    if updated_hash:
+        await session.execute(update(User).where(User.id == user.id).values(password=updated_hash, updated_at=User.updated_at))
+        await session.commit()
 
     access_token = create_access_token({'sub': user.email})
     return {'access_token': access_token, 'token_type': 'Bearer'}
+
+
+def create_app(settings: Settings | None = None):
+    app = FastAPI(title='Minha API TOP', lifespan=lifespan)
+    app.state.settings = settings or Settings()
+    app.add_middleware(MetricsMiddleware)
+    app.add_middleware(QueryStatsMiddleware, settings=app.state.settings)
+    app.include_router(api)
+    return app
@@ -0,0 +1,107 @@
+import logging
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+from sqlalchemy import Column, Integer, MetaData, String, Table, delete, func, insert, select, update
+from sqlalchemy.engine import Connection
+
+logger = logging.getLogger('fast_zero.backfill')
+
+# ponto de retomada de cada backfill; fica fora do metadata da aplicação (ver migrations/env.py)
+backfill_metadata = MetaData()
+backfill_progress = Table(
+    'backfill_progress',
+    backfill_metadata,
+    Column('name', String, primary_key=True),
+    Column('last_id', Integer, nullable=False),
+)
+
+
+@dataclass
+class Backfill:
+    # UPDATE table SET values [WHERE where]; name identifica o ponto de retomada
+    name: str
+    table: Table
+    values: dict
+    where: object = None
+
+
+@dataclass
+class BackfillProgress:
+    name: str
+    done: int
+    total: int
+    updated: int
+    last_id: int
+    elapsed: float
+
+
+def log_progress(progress: BackfillProgress):
+    percent = progress.done / progress.total * 100 if progress.total else 100
+    logger.info(
+        'backfill %s: %d/%d rows (%.0f%%), %d updated, last id %d, %.1fs',
+        progress.name,
+        progress.done,
+        progress.total,
+        percent,
+        progress.updated,
+        progress.last_id,
+        progress.elapsed,
+    )
+
+
+@contextmanager
+def _transaction(bind):
+    # Engine: conexão nova por lote; Connection: commit por lote. Em AUTOCOMMIT (autocommit_block
+    # do Alembic) cada comando já se confirma sozinho: o lote e o checkpoint deixam de ser
+    # atômicos, então use um `where` que exclua as linhas já feitas
+    if isinstance(bind, Connection) and bind.get_execution_options().get('isolation_level') == 'AUTOCOMMIT':
+        yield bind
+    elif isinstance(bind, Connection):
+        try:
+            yield bind
+        except BaseException:
+            bind.rollback()
+            raise
+        bind.commit()
+    else:
+        with bind.begin() as connection:
+            yield connection
+
+
+def run_backfill(bind, job: Backfill, *, batch_size: int = 1000, pause: float = 0, progress=log_progress):
+    # UPDATE em lotes pela chave primária, cada lote na sua transação: a trava de escrita
+    # dura um lote, não a tabela inteira. O último id vai junto no mesmo commit, então
+    # rodar de novo com o mesmo `job.name` continua de onde parou.
+    name, table = job.name, job.table
+    key = table.primary_key.columns[0]
+    with _transaction(bind) as connection:
+        backfill_metadata.create_all(connection)
+        last_id = connection.scalar(select(backfill_progress.c.last_id).where(backfill_progress.c.name == name))
+        if last_id is None:
+            last_id = 0
+            connection.execute(insert(backfill_progress).values(name=name, last_id=last_id))
+        done = connection.scalar(select(func.count()).select_from(table).where(key <= last_id))
+        total = connection.scalar(select(func.count()).select_from(table))
+
+    start, updated = time.perf_counter(), 0
+    while True:
+        with _transaction(bind) as connection:
+            ids = connection.scalars(select(key).where(key > last_id).order_by(key).limit(batch_size)).all()
+            if not ids:
+                connection.execute(delete(backfill_progress).where(backfill_progress.c.name == name))
+                return updated
+            statement = update(table).where(key.between(ids[0], ids[-1])).values(job.values)
+            if job.where is not None:
+                statement = statement.where(job.where)
+            updated += connection.execute(statement).rowcount
+            last_id = ids[-1]
+            connection.execute(update(backfill_progress).where(backfill_progress.c.name == name).values(last_id=last_id))
+
+        done += len(ids)
+        if progress is not None:
+            progress(BackfillProgress(name, done, total, updated, last_id, time.perf_counter() - start))
+        if pause:
+            # folga entre lotes para as escritas da aplicação passarem
+            time.sleep(pause)
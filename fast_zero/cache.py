@@ -0,0 +1,474 @@
+import asyncio
+import logging
+import os
+import secrets
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from urllib.parse import unquote, urlsplit
+
+import orjson
+
+from fast_zero.metrics import Counter
+from fast_zero.settings import Settings
+
+cache_hits = Counter('fast_zero_cache_hits_total', 'Cache lookups answered from the cache.', ('cache',))
+cache_misses = Counter('fast_zero_cache_misses_total', 'Cache lookups that fell through to the source.', ('cache',))
+cache_evictions = Counter('fast_zero_cache_evictions_total', 'Entries evicted to stay within the size limit.', ('cache',))
+cache_expirations = Counter('fast_zero_cache_expirations_total', 'Entries dropped after their TTL ran out.', ('cache',))
+
+# geração por chave: invalidate troca a geração, e um set que leu a geração antes disso é
+# descartado. Vive mais que qualquer leitura entre generation() e set()
+GENERATION_TTL_SECONDS = 300
+# tamanho dos caches sem maxsize nas settings, com backend compartilhado
+DEFAULT_MAXSIZE = 10_000
+
+
+class TTLCache:
+    # LRU limitado por maxsize, com expiração por entrada (ttl padrão ou explícito)
+    def __init__(self, name: str, maxsize: int, ttl: float):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[0] <= time.monotonic():
+                del self._data[key]
+                cache_expirations.inc(cache=self.name)
+                entry = None
+            if entry is None:
+                cache_misses.inc(cache=self.name)
+                return None
+            self._data.move_to_end(key)
+        cache_hits.inc(cache=self.name)
+        return entry[1]
+
+    def set(self, key, value, ttl: float | None = None):
+        ttl = self.ttl if ttl is None else ttl
+        if self.maxsize <= 0 or ttl <= 0:
+            return
+        evicted = 0
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                evicted += 1
+        if evicted:
+            cache_evictions.inc(evicted, cache=self.name)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def hit_rate(self):
+        hits = cache_hits.value(cache=self.name)
+        lookups = hits + cache_misses.value(cache=self.name)
+        return hits / lookups if lookups else 0.0
+
+
+cache_errors = Counter('fast_zero_cache_errors_total', 'Cache backend errors, answered as misses.', ('cache',))
+
+logger = logging.getLogger('fast_zero.cache')
+
+
+def dumps(value):
+    # JSON (nunca pickle): quem escreve no cache compartilhado não consegue executar código aqui
+    return orjson.dumps(value, default=_encode_datetime, option=orjson.OPT_PASSTHROUGH_DATETIME)
+
+
+def loads(raw: bytes):
+    value = orjson.loads(raw)
+    if isinstance(value, dict):
+        return {key: datetime.fromisoformat(item['$dt']) if isinstance(item, dict) and '$dt' in item else item for key, item in value.items()}
+    return value
+
+
+def _encode_datetime(value):
+    if isinstance(value, datetime):
+        return {'$dt': value.isoformat()}
+    raise TypeError
+
+
+class MemoryCache:
+    # TTLCache por processo atrás da mesma interface assíncrona dos backends compartilhados
+    def __init__(self, name: str, maxsize: int, ttl: float):
+        self.name = name
+        self.enabled = maxsize > 0
+        self._cache = TTLCache(name, maxsize, ttl)
+        self._generations = TTLCache(f'{name}_generation', maxsize, GENERATION_TTL_SECONDS)
+
+    async def get(self, key):
+        return self._cache.get(key)
+
+    async def generation(self, key):
+        return self._generations.get(key) or ''
+
+    async def set(self, key, value, ttl: float | None = None, generation: str | None = None):
+        if generation is not None and (self._generations.get(key) or '') != generation:
+            return
+        self._cache.set(key, value, ttl)
+
+    async def delete(self, *keys):
+        for key in keys:
+            self._cache.delete(key)
+
+    async def invalidate(self, *keys):
+        for key in keys:
+            self._generations.set(key, _new_generation())
+            self._cache.delete(key)
+
+    async def clear(self):
+        self._cache.clear()
+
+
+class SQLiteCache:
+    # um arquivo SQLite (em /dev/shm fica na memória) compartilhado pelos workers da máquina;
+    # as consultas rodam na thread da conexão (ver SQLiteConnection), não no event loop
+    def __init__(self, name: str, maxsize: int, ttl: float, db: 'SQLiteConnection'):
+        self.name = name
+        self.maxsize = maxsize
+        self.enabled = maxsize > 0
+        self.ttl = ttl
+        self._db = db
+        self._writes = 0
+
+    async def get(self, key):
+        return await self._run(self._get, key)
+
+    async def generation(self, key):
+        return await self._run(self._generation, key)
+
+    async def set(self, key, value, ttl: float | None = None, generation: str | None = None):
+        ttl = self.ttl if ttl is None else ttl
+        if self.maxsize <= 0 or ttl <= 0:
+            return
+        await self._run(self._set, key, dumps(value), ttl, generation)
+
+    async def delete(self, *keys):
+        await self._run(self._delete, keys)
+
+    async def invalidate(self, *keys):
+        await self._run(self._invalidate, keys)
+
+    async def clear(self):
+        await self._run(self._clear)
+
+    async def _run(self, func, *args):
+        try:
+            return await self._db.run(func, *args)
+        except sqlite3.Error:
+            return _failed(self.name)
+
+    def _get(self, db: sqlite3.Connection, key):
+        row = db.execute('SELECT value, expires_at FROM cache_entries WHERE namespace = ? AND key = ?', (self.name, str(key))).fetchone()
+        if row is not None and row[1] <= time.time():
+            db.execute('DELETE FROM cache_entries WHERE namespace = ? AND key = ?', (self.name, str(key)))
+            cache_expirations.inc(cache=self.name)
+            row = None
+        if row is None:
+            cache_misses.inc(cache=self.name)
+            return None
+        cache_hits.inc(cache=self.name)
+        return loads(row[0])
+
+    def _generation(self, db: sqlite3.Connection, key):
+        row = db.execute(
+            'SELECT generation FROM cache_generations WHERE namespace = ? AND key = ? AND expires_at > ?', (self.name, str(key), time.time())
+        ).fetchone()
+        return row[0] if row is not None else ''
+
+    def _set(self, db: sqlite3.Connection, key, raw: bytes, ttl: float, generation: str | None):
+        now = time.time()
+        if generation is None:
+            db.execute(
+                'INSERT OR REPLACE INTO cache_entries (namespace, key, value, expires_at) VALUES (?, ?, ?, ?)',
+                (self.name, str(key), raw, now + ttl),
+            )
+        else:
+            # comparação e escrita num comando só: um invalidate entre os dois não existe
+            db.execute(
+                'INSERT OR REPLACE INTO cache_entries (namespace, key, value, expires_at) SELECT ?, ?, ?, ? '
+                "WHERE coalesce((SELECT generation FROM cache_generations WHERE namespace = ? AND key = ? AND expires_at > ?), '') = ?",
+                (self.name, str(key), raw, now + ttl, self.name, str(key), now, generation),
+            )
+        # limite de tamanho aplicado a cada ~10% de maxsize escritas, não em toda escrita
+        self._writes += 1
+        if self._writes >= max(self.maxsize // 10, 1):
+            self._writes = 0
+            self._prune(db)
+
+    def _delete(self, db: sqlite3.Connection, keys):
+        db.executemany('DELETE FROM cache_entries WHERE namespace = ? AND key = ?', [(self.name, str(key)) for key in keys])
+
+    def _invalidate(self, db: sqlite3.Connection, keys):
+        db.executemany(
+            'INSERT OR REPLACE INTO cache_generations (namespace, key, generation, expires_at) VALUES (?, ?, ?, ?)',
+            [(self.name, str(key), _new_generation(), time.time() + GENERATION_TTL_SECONDS) for key in keys],
+        )
+        db.executemany('DELETE FROM cache_entries WHERE namespace = ? AND key = ?', [(self.name, str(key)) for key in keys])
+
+    def _clear(self, db: sqlite3.Connection):
+        db.execute('DELETE FROM cache_entries WHERE namespace = ?', (self.name,))
+
+    def _prune(self, db: sqlite3.Connection):
+        db.execute('DELETE FROM cache_generations WHERE namespace = ? AND expires_at <= ?', (self.name, time.time()))
+        expired = db.execute('DELETE FROM cache_entries WHERE namespace = ? AND expires_at <= ?', (self.name, time.time())).rowcount
+        if expired:
+            cache_expirations.inc(expired, cache=self.name)
+        excess = db.execute('SELECT count(*) FROM cache_entries WHERE namespace = ?', (self.name,)).fetchone()[0] - self.maxsize
+        if excess > 0:
+            # sem LRU entre processos: sai quem expiraria primeiro
+            db.execute(
+                'DELETE FROM cache_entries WHERE namespace = ? AND key IN '
+                '(SELECT key FROM cache_entries WHERE namespace = ? ORDER BY expires_at LIMIT ?)',
+                (self.name, self.name, excess),
+            )
+            cache_evictions.inc(excess, cache=self.name)
+
+
+class SQLiteConnection:
+    # sqlite3 bloqueia: com o arquivo travado por outro worker, a espera do busy timeout (e o
+    # checkpoint do WAL) parariam o event loop. Tudo roda numa thread só, que também mantém
+    # em série o uso da conexão, compartilhada pelos caches nomeados
+    def __init__(self, path: str):
+        self._executor = ThreadPoolExecutor(1, thread_name_prefix='fast_zero-cache')
+        self._db = self._executor.submit(open_sqlite_cache, path).result()
+
+    async def run(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, self._db, *args)
+
+    async def close(self):
+        await asyncio.get_running_loop().run_in_executor(self._executor, self._db.close)
+        self._executor.shutdown()
+
+
+def default_sqlite_cache_path():
+    # fora do /tmp compartilhado: o cache guarda dados de usuários e só o dono do processo lê
+    directory = Path(os.environ.get('XDG_CACHE_HOME') or Path.home() / '.cache') / 'fast_zero'
+    directory.mkdir(mode=0o700, parents=True, exist_ok=True)
+    return str(directory / 'cache.db')
+
+
+def open_sqlite_cache(path: str):
+    db = sqlite3.connect(path, timeout=0.05, isolation_level=None, check_same_thread=False)
+    if Path(path).exists():
+        # antes do WAL: -wal e -shm nascem com as permissões do arquivo principal
+        Path(path).chmod(0o600)
+    db.execute('PRAGMA journal_mode=WAL')
+    db.execute('PRAGMA synchronous=OFF')
+    db.execute(
+        'CREATE TABLE IF NOT EXISTS cache_entries (namespace TEXT, key TEXT, value BLOB, expires_at REAL, PRIMARY KEY (namespace, key)) WITHOUT ROWID'
+    )
+    db.execute('CREATE INDEX IF NOT EXISTS ix_cache_entries_expires_at ON cache_entries (namespace, expires_at)')
+    db.execute(
+        'CREATE TABLE IF NOT EXISTS cache_generations '
+        '(namespace TEXT, key TEXT, generation TEXT, expires_at REAL, PRIMARY KEY (namespace, key)) WITHOUT ROWID'
+    )
+    return db
+
+
+class RedisError(Exception):
+    pass
+
+
+class RedisClient:
+    # cliente RESP mínimo (GET/SET/DEL/SCAN bastam aqui): uma conexão por worker, comandos
+    # em série; aberta na primeira chamada, já dentro do event loop
+    def __init__(self, url: str, timeout: float):
+        parsed = urlsplit(url)
+        self.host = parsed.hostname or 'localhost'
+        self.port = parsed.port or 6379
+        self.password = unquote(parsed.password) if parsed.password else None
+        self.db = int(parsed.path.lstrip('/') or 0)
+        self.timeout = timeout
+        self._reader = self._writer = None
+        self._lock = asyncio.Lock()
+
+    async def execute(self, *args):
+        async with self._lock:
+            try:
+                async with asyncio.timeout(self.timeout):
+                    if self._writer is None:
+                        await self._connect()
+                    return await self._call(*args)
+            except BaseException:
+                # qualquer interrupção no meio do protocolo (timeout, cancelamento, erro do
+                # servidor, resposta inesperada) deixa respostas pendentes no socket: a próxima
+                # chamada abre outra conexão em vez de ler a resposta de um comando anterior
+                await self.close()
+                raise
+
+    async def _connect(self):
+        self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+        if self.password:
+            await self._call('AUTH', self.password)
+        if self.db:
+            await self._call('SELECT', self.db)
+
+    async def _call(self, *args):
+        parts = [f'*{len(args)}\r\n'.encode()]
+        for arg in args:
+            data = arg if isinstance(arg, bytes) else str(arg).encode()
+            parts.append(b'$%d\r\n%s\r\n' % (len(data), data))
+        self._writer.write(b''.join(parts))
+        await self._writer.drain()
+        return await self._reply()
+
+    async def _reply(self):
+        line = (await self._reader.readuntil(b'\r\n'))[:-2]
+        kind, rest = line[:1], line[1:]
+        if kind == b'+':
+            return rest.decode()
+        if kind == b'-':
+            raise RedisError(rest.decode())
+        if kind == b':':
+            return int(rest)
+        if kind == b'$':
+            size = int(rest)
+            return None if size < 0 else (await self._reader.readexactly(size + 2))[:-2]
+        if kind == b'*':
+            size = int(rest)
+            return None if size < 0 else [await self._reply() for _ in range(size)]
+        raise RedisError(f'unexpected reply {line!r}')
+
+    async def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._reader = self._writer = None
+
+
+# SET só se a geração ainda for a lida antes da consulta à fonte; atômico no servidor
+SET_IF_GENERATION = """
+if (redis.call('GET', KEYS[2]) or '') == ARGV[3] then
+    return redis.call('SET', KEYS[1], ARGV[1], 'PX', ARGV[2])
+end
+return false
+"""
+
+
+class RedisCache:
+    # chaves fast_zero:<cache>:<chave> com PX; o tamanho é limitado pelo maxmemory do servidor.
+    # Gerações em fast_zero-generation:<cache>:<chave>, fora do prefixo que o clear varre
+    def __init__(self, name: str, ttl: float, client: RedisClient):
+        self.name = name
+        self.ttl = ttl
+        self.enabled = ttl > 0
+        self._client = client
+        self._prefix = f'fast_zero:{name}:'
+        self._generation_prefix = f'fast_zero-generation:{name}:'
+
+    async def get(self, key):
+        try:
+            raw = await self._client.execute('GET', self._prefix + str(key))
+        except (OSError, TimeoutError, asyncio.IncompleteReadError, RedisError):
+            return _failed(self.name)
+        if raw is None:
+            cache_misses.inc(cache=self.name)
+            return None
+        cache_hits.inc(cache=self.name)
+        return loads(raw)
+
+    async def generation(self, key):
+        try:
+            raw = await self._client.execute('GET', self._generation_prefix + str(key))
+        except (OSError, TimeoutError, asyncio.IncompleteReadError, RedisError):
+            return _failed(self.name)
+        return raw.decode() if raw is not None else ''
+
+    async def set(self, key, value, ttl: float | None = None, generation: str | None = None):
+        ttl = self.ttl if ttl is None else ttl
+        if ttl <= 0:
+            return
+        px = max(int(ttl * 1000), 1)
+        try:
+            if generation is None:
+                await self._client.execute('SET', self._prefix + str(key), dumps(value), 'PX', px)
+            else:
+                await self._client.execute(
+                    'EVAL', SET_IF_GENERATION, 2, self._prefix + str(key), self._generation_prefix + str(key), dumps(value), px, generation
+                )
+        except (OSError, TimeoutError, asyncio.IncompleteReadError, RedisError):
+            _failed(self.name)
+
+    async def delete(self, *keys):
+        try:
+            await self._client.execute('DEL', *(self._prefix + str(key) for key in keys))
+        except (OSError, TimeoutError, asyncio.IncompleteReadError, RedisError):
+            _failed(self.name)
+
+    async def invalidate(self, *keys):
+        try:
+            for key in keys:
+                await self._client.execute('SET', self._generation_prefix + str(key), _new_generation(), 'PX', GENERATION_TTL_SECONDS * 1000)
+            await self._client.execute('DEL', *(self._prefix + str(key) for key in keys))
+        except (OSError, TimeoutError, asyncio.IncompleteReadError, RedisError):
+            _failed(self.name)
+
+    async def clear(self):
+        cursor = '0'
+        try:
+            while True:
+                cursor, keys = await self._client.execute('SCAN', cursor, 'MATCH', f'{self._prefix}*', 'COUNT', 1000)
+                if keys:
+                    await self._client.execute('DEL', *keys)
+                if cursor == b'0':
+                    break
+        except (OSError, TimeoutError, asyncio.IncompleteReadError, RedisError):
+            _failed(self.name)
+
+
+def _new_generation():
+    return secrets.token_hex(8)
+
+
+def _failed(name: str):
+    # cache fora do ar não derruba a requisição: vira miss e a fonte responde
+    cache_errors.inc(cache=name)
+    logger.warning('cache %s unavailable', name, exc_info=True)
+
+
+class CacheBackend:
+    # escolhido por CACHE_BACKEND; cada cache nomeado é um namespace no mesmo armazenamento.
+    # memory: cópia por worker. sqlite/redis: uma cópia só, então um delete depois de uma
+    # escrita vale na hora para todos os workers
+    def __init__(self, settings: Settings):
+        self.kind = settings.CACHE_BACKEND
+        self._sqlite = self._redis = None
+        if self.kind == 'sqlite':
+            self._sqlite = SQLiteConnection(settings.CACHE_URL or default_sqlite_cache_path())
+        elif self.kind == 'redis':
+            self._redis = RedisClient(settings.CACHE_URL or 'redis://localhost:6379/0', settings.CACHE_TIMEOUT_SECONDS)
+
+    def cache(self, name: str, maxsize: int | None, ttl: float):
+        if maxsize is None:
+            # sem valor nas settings: ligado só com backend compartilhado. Em memory a
+            # invalidação de um worker não chega aos outros, que serviriam a cópia velha
+            maxsize = 0 if self.kind == 'memory' else DEFAULT_MAXSIZE
+        if self._sqlite is not None:
+            return SQLiteCache(name, maxsize, ttl, self._sqlite)
+        if self._redis is not None:
+            # maxsize 0 desliga o cache em qualquer backend
+            return RedisCache(name, ttl if maxsize > 0 else 0, self._redis)
+        return MemoryCache(name, maxsize, ttl)
+
+    async def close(self):
+        if self._sqlite is not None:
+            await self._sqlite.close()
+        if self._redis is not None:
+            await self._redis.close()
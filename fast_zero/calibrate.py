@@ -0,0 +1,81 @@
+"""Calibra os custos do Argon2id para a máquina atual.
+
+python -m fast_zero.calibrate --target-ms 250 --env-file .env
+"""
+
+import argparse
+import statistics
+import time
+from pathlib import Path
+
+from pwdlib.hashers.argon2 import Argon2Hasher
+
+MIN_MEMORY_COST = 19_456  # KiB; piso recomendado pela OWASP para Argon2id
+MAX_TIME_COST = 20
+
+
+def verify_latency_ms(time_cost: int, memory_cost: int, parallelism: int, samples: int):
+    hasher = Argon2Hasher(time_cost=time_cost, memory_cost=memory_cost, parallelism=parallelism)
+    hashed = hasher.hash('calibration-password')
+    timings = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        hasher.verify('calibration-password', hashed)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def calibrate(target_ms: float, memory_cost: int, parallelism: int, samples: int = 5, min_memory_cost: int = MIN_MEMORY_COST):
+    # memória é o custo que mais protege; só reduz se nem time_cost=1 cabe no alvo
+    while memory_cost > min_memory_cost and verify_latency_ms(1, memory_cost, parallelism, samples) > target_ms:
+        memory_cost = max(memory_cost // 2, min_memory_cost)
+
+    # maior time_cost que ainda cabe no alvo
+    time_cost = 1
+    while time_cost < MAX_TIME_COST:
+        latency = verify_latency_ms(time_cost + 1, memory_cost, parallelism, samples)
+        if latency > target_ms:
+            break
+        time_cost += 1
+
+    return {
+        'ARGON2_TIME_COST': time_cost,
+        'ARGON2_MEMORY_COST': memory_cost,
+        'ARGON2_PARALLELISM': parallelism,
+    }
+
+
+def write_env(path: Path, values: dict):
+    lines = path.read_text(encoding='utf-8').splitlines() if path.exists() else []
+    pending = dict(values)
+    for index, line in enumerate(lines):
+        key = line.split('=', 1)[0].strip()
+        if key in pending:
+            lines[index] = f'{key}={pending.pop(key)}'
+    lines += [f'{key}={value}' for key, value in pending.items()]
+    path.write_text('\n'.join(lines) + '\n', encoding='utf-8')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--target-ms', type=float, default=250, help='latência alvo de um verify')
+    parser.add_argument('--memory-cost', type=int, default=65_536, help='memória inicial em KiB')
+    parser.add_argument('--parallelism', type=int, default=4)
+    parser.add_argument('--samples', type=int, default=5)
+    parser.add_argument('--env-file', type=Path, default=Path('.env'))
+    parser.add_argument('--dry-run', action='store_true', help='só mostra, não grava o arquivo')
+    args = parser.parse_args()
+
+    values = calibrate(args.target_ms, args.memory_cost, args.parallelism, args.samples)
+    latency = verify_latency_ms(values['ARGON2_TIME_COST'], values['ARGON2_MEMORY_COST'], args.parallelism, args.samples)
+    for key, value in values.items():
+        print(f'{key}={value}')
+    print(f'# verify ≈ {latency:.1f} ms (alvo {args.target_ms:.0f} ms)')
+
+    if not args.dry_run:
+        write_env(args.env_file, values)
+        print(f'# gravado em {args.env_file}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+import base64
+import json
+from datetime import datetime, timedelta, timezone
+from http import HTTPStatus
+
+from fastapi import HTTPException
+from sqlalchemy import and_, false, or_, select, true
+
+from fast_zero.models import User, user_deletions
+
+# posição no feed: (instante, tipo, id). No mesmo instante o tombstone vem antes do usuário:
+# um id apagado e recriado aparece removido e depois vivo, nunca o contrário.
+# AFTER_ALL só existe em ?since=: tudo que for estritamente depois do instante
+DELETION, UPSERT, AFTER_ALL = 0, 1, 2
+
+
+def encode_position(position):
+    changed_at, kind, item_id = position
+    raw = json.dumps({'t': changed_at.isoformat(), 'k': kind, 'i': item_id}, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b'=').decode()
+
+
+def decode_position(cursor: str):
+    invalid_cursor = HTTPException(status_code=HTTPStatus.BAD_REQUEST, detail='Invalid cursor')
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        position = (datetime.fromisoformat(payload['t']), int(payload['k']), int(payload['i']))
+    except (ValueError, KeyError, TypeError):
+        raise invalid_cursor
+    if position[1] not in {DELETION, UPSERT, AFTER_ALL}:
+        raise invalid_cursor
+    return position
+
+
+def since_position(since: datetime):
+    # timestamps são gravados em UTC sem fuso
+    if since.tzinfo is not None:
+        since = since.astimezone(timezone.utc).replace(tzinfo=None)
+    return (since, AFTER_ALL, 0)
+
+
+def _after(changed_at, item_id, kind: int, position):
+    # (changed_at, kind, item_id) > position, numa forma que usa o índice (changed_at, id)
+    if position is None:
+        return true()
+    at, position_kind, position_id = position
+    if kind == position_kind:
+        tie = item_id > position_id
+    else:
+        tie = true() if kind > position_kind else false()
+    return or_(changed_at > at, and_(changed_at == at, tie))
+
+
+async def read_changes(session, position, limit: int, lag: float):
+    # cada lado lê no máximo limit + 1 linhas pelo seu índice; o merge decide a página.
+    # lag segura mudanças recentes, cujo commit ainda pode chegar fora de ordem
+    settled_before = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(seconds=lag)
+    users = await session.execute(
+        select(User.id, User.username, User.email, User.updated_at)
+        .where(_after(User.updated_at, User.id, UPSERT, position), User.updated_at <= settled_before)
+        .order_by(User.updated_at, User.id)
+        .limit(limit + 1)
+    )
+    deletions = await session.execute(
+        select(user_deletions.c.id, user_deletions.c.user_id, user_deletions.c.deleted_at)
+        .where(_after(user_deletions.c.deleted_at, user_deletions.c.id, DELETION, position), user_deletions.c.deleted_at <= settled_before)
+        .order_by(user_deletions.c.deleted_at, user_deletions.c.id)
+        .limit(limit + 1)
+    )
+    merged = sorted(
+        [((row.updated_at, UPSERT, row.id), row) for row in users] + [((row.deleted_at, DELETION, row.id), row) for row in deletions],
+        key=lambda change: change[0],
+    )
+    page = merged[:limit]
+
+    changes = {'users': [], 'deleted': []}
+    for (_, kind, _), row in page:
+        if kind == UPSERT:
+            changes['users'].append({'id': row.id, 'username': row.username, 'email': row.email, 'updated_at': row.updated_at})
+        else:
+            changes['deleted'].append({'id': row.user_id, 'deleted_at': row.deleted_at})
+
+    # sem mudanças novas o cursor fica onde estava: é a marca d'água do próximo poll
+    position = page[-1][0] if page else position
+    changes['next_cursor'] = encode_position(position) if position else None
+    changes['has_more'] = len(merged) > limit
+    return changes
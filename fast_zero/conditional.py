@@ -0,0 +1,56 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from http import HTTPStatus
+
+from fastapi import Request, Response
+
+
+def etag_for(*versions):
+    # versions: pares (id, updated_at); qualquer escrita muda o updated_at
+    digest = hashlib.blake2b(repr(versions).encode(), digest_size=12).hexdigest()
+    return f'"{digest}"'
+
+
+def http_date(value: datetime):
+    # updated_at é gravado em UTC sem fuso
+    return format_datetime(value.replace(tzinfo=timezone.utc, microsecond=0), usegmt=True)
+
+
+def user_validators(user_id: int, updated_at: datetime, fields=None):
+    # ?fields= muda o corpo, então entra no ETag (sem ele, o ETag de sempre)
+    versions = ((user_id, updated_at),) if fields is None else ((user_id, updated_at), fields)
+    return {'ETag': etag_for(*versions), 'Last-Modified': http_date(updated_at)}
+
+
+def page_validators(users, total: int | None = None, fields=None):
+    # sem Last-Modified na lista: apagar um usuário não aumenta o maior updated_at
+    versions = [(user.id, user.updated_at) for user in users]
+    return {'ETag': etag_for(*versions, total) if fields is None else etag_for(*versions, total, fields)}
+
+
+def is_conditional(request: Request):
+    return 'if-none-match' in request.headers or 'if-modified-since' in request.headers
+
+
+def is_not_modified(request: Request, validators: dict):
+    if_none_match = request.headers.get('if-none-match')
+    if if_none_match is not None:
+        # If-None-Match tem precedência sobre If-Modified-Since (comparação fraca)
+        tags = {tag.strip().removeprefix('W/') for tag in if_none_match.split(',')}
+        return '*' in tags or validators['ETag'] in tags
+
+    if_modified_since = request.headers.get('if-modified-since')
+    if if_modified_since is None or 'Last-Modified' not in validators:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    return parsedate_to_datetime(validators['Last-Modified']) <= since
+
+
+def not_modified(validators: dict):
+    return Response(status_code=HTTPStatus.NOT_MODIFIED, headers=validators)
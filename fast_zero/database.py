@@ -1,11 +1,126 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import Session
+import itertools
+import time
 
+from fastapi import Depends, Request, Response
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from fast_zero.metrics import Gauge, Histogram
+from fast_zero.querylog import instrument_queries
 from fast_zero.settings import Settings
 
-engine = create_engine(Settings().DATABASE_URL)
+pool_checked_out = Gauge('fast_zero_db_pool_checked_out', 'Connections currently checked out of the pool.')
+pool_checkout_seconds = Histogram('fast_zero_db_pool_checkout_seconds', 'Time a connection stays checked out.')
+pool_wait_seconds = Histogram('fast_zero_db_pool_wait_seconds', 'Time spent waiting for a pool connection.')
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    # não existe evento "antes do checkout"; medimos a espera na fila aqui
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            pool_wait_seconds.observe(time.perf_counter() - start)
+
+
+def build_engine(settings: Settings):
+    url = make_url(settings.DATABASE_URL)
+    is_sqlite = url.get_backend_name() == 'sqlite'
+    options = {'pool_pre_ping': settings.DB_POOL_PRE_PING}
+    # SQLite em memória usa StaticPool (uma conexão só): sem opções de fila
+    if not (is_sqlite and url.database in {None, '', ':memory:'}):
+        options.update(
+            poolclass=TimedQueuePool,
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+            pool_recycle=settings.DB_POOL_RECYCLE,
+        )
+
+    engine = create_async_engine(url, **options)
+    if is_sqlite:
+        event.listen(engine.sync_engine, 'connect', _sqlite_pragmas(settings))
+    instrument_queries(engine.sync_engine, settings)
+    event.listen(engine.sync_engine.pool, 'checkout', _on_checkout)
+    event.listen(engine.sync_engine.pool, 'checkin', _on_checkin)
+    return engine
+
+
+def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+    connection_record.info['checked_out_at'] = time.perf_counter()
+    pool_checked_out.inc()
+
+
+def _on_checkin(dbapi_connection, connection_record):
+    checked_out_at = connection_record.info.pop('checked_out_at', None)
+    if checked_out_at is not None:
+        pool_checked_out.dec()
+        pool_checkout_seconds.observe(time.perf_counter() - checked_out_at)
+
+
+def _sqlite_pragmas(settings: Settings):
+    pragmas = (
+        f'PRAGMA journal_mode={settings.SQLITE_JOURNAL_MODE}',
+        f'PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}',
+        f'PRAGMA cache_size={int(settings.SQLITE_CACHE_SIZE)}',
+        f'PRAGMA mmap_size={int(settings.SQLITE_MMAP_SIZE)}',
+        f'PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT_MS)}',
+    )
+
+    def on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma in pragmas:
+            cursor.execute(pragma)
+        cursor.close()
+
+    return on_connect
+
 
+class SessionRouter:
+    # leituras em round-robin entre as réplicas; sem réplicas, tudo no primário
+    def __init__(self, primary, replicas):
+        self.primary = primary
+        self.replicas = replicas
+        self._next_replica = itertools.cycle(replicas or [primary])
 
-def get_session():
-    with Session(engine) as session:
+    def read_engine(self, pinned: bool):
+        return self.primary if pinned else next(self._next_replica)
+
+    async def dispose(self):
+        for engine in (self.primary, *self.replicas):
+            await engine.dispose()
+
+
+def build_session_router(settings: Settings):
+    # chamado no lifespan: cada worker abre o próprio pool, nada atravessa o fork
+    primary = build_engine(settings)
+    replicas = [build_engine(settings.model_copy(update={'DATABASE_URL': url})) for url in settings.DATABASE_REPLICA_URLS]
+    return SessionRouter(primary, replicas)
+
+
+# cliente que acabou de escrever lê do primário até o cookie expirar (read-your-writes)
+PIN_PRIMARY_COOKIE = 'fz_read_primary'
+
+
+async def get_session(request: Request):
+    async with AsyncSession(request.app.state.db.primary, expire_on_commit=False) as session:
         yield session
+
+
+async def get_read_session(request: Request):
+    bind = request.app.state.db.read_engine(pinned=PIN_PRIMARY_COOKIE in request.cookies)
+    async with AsyncSession(bind, expire_on_commit=False) as session:
+        yield session
+
+
+def pin_to_primary(request: Request, response: Response, session: AsyncSession = Depends(get_session)):
+    # o cookie sai no commit da sessão da rota: escrita que falhou (409, 404) não fixa o cliente
+    max_age = request.app.state.settings.READ_PRIMARY_PIN_SECONDS
+
+    def on_commit(_):
+        response.set_cookie(PIN_PRIMARY_COOKIE, '1', max_age=max_age, httponly=True)
+
+    event.listen(session.sync_session, 'after_commit', on_commit, once=True)
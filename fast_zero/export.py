@@ -0,0 +1,34 @@
+import csv
+import io
+import json
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+
+from fast_zero.models import User
+
+EXPORT_COLUMNS = (User.id, User.username, User.email)
+
+MEDIA_TYPES = {'ndjson': 'application/x-ndjson', 'csv': 'text/csv'}
+
+
+def _ndjson(rows):
+    return ''.join(json.dumps(row._asdict(), ensure_ascii=False) + '\n' for row in rows)
+
+
+def _csv(rows):
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue()
+
+
+async def stream_users(engine: AsyncEngine, export_format: str, batch_size: int = 1000):
+    # Sessão própria: a do Depends é fechada antes do corpo ser enviado.
+    serialize = _csv if export_format == 'csv' else _ndjson
+    if export_format == 'csv':
+        yield ','.join(column.key for column in EXPORT_COLUMNS) + '\r\n'
+
+    async with AsyncSession(engine) as session:
+        result = await session.stream(select(*EXPORT_COLUMNS).order_by(User.id).execution_options(yield_per=batch_size))
+        async for rows in result.partitions():
+            yield serialize(rows)
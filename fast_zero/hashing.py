@@ -0,0 +1,124 @@
+import asyncio
+import functools
+import time
+from http import HTTPStatus
+
+from fastapi import HTTPException
+
+from fast_zero.metrics import Counter, Gauge, Histogram
+from fast_zero.settings import Settings
+
+
+def argon2_costs(settings: Settings):
+    # custos vêm das settings (calibrados com `python -m fast_zero.calibrate`)
+    return settings.ARGON2_TIME_COST, settings.ARGON2_MEMORY_COST, settings.ARGON2_PARALLELISM
+
+
+@functools.cache
+def password_hash(costs: tuple[int, int, int] | None = None):
+    # pwdlib/argon2 só são importados no primeiro hash (em geral, dentro do worker)
+    from pwdlib import PasswordHash  # noqa: PLC0415
+    from pwdlib.hashers.argon2 import Argon2Hasher  # noqa: PLC0415
+
+    time_cost, memory_cost, parallelism = costs or argon2_costs(Settings())
+    return PasswordHash((Argon2Hasher(time_cost=time_cost, memory_cost=memory_cost, parallelism=parallelism),))
+
+
+hash_queue_depth = Gauge('fast_zero_hash_queue_depth', 'Password hashing jobs queued or running.')
+hash_latency = Histogram('fast_zero_hash_seconds', 'Password hashing latency, queue time included.', ('operation',))
+hash_rejected = Counter('fast_zero_hash_rejected_total', 'Password hashing jobs rejected because the queue was full.')
+
+
+def get_password_hash(password: str, costs: tuple[int, int, int] | None = None):
+    return password_hash(costs).hash(password)
+
+
+def verify_password(plain_password: str, hashed_password: str, costs: tuple[int, int, int] | None = None):
+    return password_hash(costs).verify(plain_password, hashed_password)
+
+
+def verify_and_update_password(plain_password: str, hashed_password: str, costs: tuple[int, int, int] | None = None):
+    # (válida, novo hash se o armazenado usa outros custos, senão None)
+    return password_hash(costs).verify_and_update(plain_password, hashed_password)
+
+
+def hash_passwords(passwords: list[str], costs: tuple[int, int, int] | None = None):
+    return [password_hash(costs).hash(password) for password in passwords]
+
+
+class HashingExecutor:
+    # Argon2 segura o GIL por dezenas de ms; rodar em processos separados
+    # evita travar o event loop e as outras requisições do worker.
+    def __init__(self, workers: int, queue_size: int, costs: tuple[int, int, int] | None = None, chunk_size: int = 16):
+        self.workers = workers
+        # vão junto de cada tarefa: o worker (spawn) não herda as settings do app
+        self.costs = costs
+        # senhas por job em hash_many
+        self.chunk_size = chunk_size
+        self.max_pending = max(workers, 1) + queue_size
+        self.pending = 0
+        self._pool = None
+
+    def _executor(self):
+        # workers=0 usa o threadpool padrão do loop (útil em dev/testes)
+        if self._pool is None and self.workers:
+            import multiprocessing  # noqa: PLC0415
+            from concurrent.futures import ProcessPoolExecutor  # noqa: PLC0415
+
+            self._pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context('spawn'))
+        return self._pool
+
+    async def _run(self, operation: str, func, *args):
+        if self.pending >= self.max_pending:
+            hash_rejected.inc()
+            raise HTTPException(
+                status_code=HTTPStatus.SERVICE_UNAVAILABLE,
+                detail='Server busy, try again later',
+                headers={'Retry-After': '1'},
+            )
+
+        self.pending += 1
+        hash_queue_depth.set(self.pending)
+        start = time.perf_counter()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor(), functools.partial(func, costs=self.costs), *args)
+        finally:
+            self.pending -= 1
+            hash_queue_depth.set(self.pending)
+            hash_latency.observe(time.perf_counter() - start, operation=operation)
+
+    async def hash(self, password: str):
+        return await self._run('hash', get_password_hash, password)
+
+    async def verify(self, plain_password: str, hashed_password: str):
+        return await self._run('verify', verify_password, plain_password, hashed_password)
+
+    async def verify_and_update(self, plain_password: str, hashed_password: str):
+        return await self._run('verify', verify_and_update_password, plain_password, hashed_password)
+
+    async def hash_many(self, passwords: list[str]):
+        # lotes pequenos, no máximo um por worker em voo: cada lote entra no fim da fila do pool,
+        # então um /token que chega no meio de uma importação espera um lote, não a importação
+        # inteira. Cada lote conta em pending: com a fila cheia a importação leva o 503
+        hashes = [None] * len(passwords)
+        starts = iter(range(0, len(passwords), self.chunk_size))
+
+        async def drain():
+            for start in starts:
+                end = start + self.chunk_size
+                hashes[start:end] = await self._run('hash_many', hash_passwords, passwords[start:end])
+
+        tasks = [asyncio.ensure_future(drain()) for _ in range(max(self.workers, 1))]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            # um lote recusado (ou o cliente que desistiu) não deixa os outros consumindo o pool
+            for task in tasks:
+                task.cancel()
+            raise
+        return hashes
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
@@ -0,0 +1,93 @@
+import asyncio
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from fast_zero.metrics import Counter, Histogram
+from fast_zero.models import User
+from fast_zero.responses import public_columns
+
+loader_batch_size = Histogram(
+    'fast_zero_user_loader_batch_size', 'Ids fetched per coalesced user query.', buckets=(1, 2, 5, 10, 25, 50, 100, 250, 500)
+)
+loader_coalesced = Counter('fast_zero_user_loader_coalesced_total', 'User lookups that joined a query already pending or running.')
+
+
+class _Batch:
+    def __init__(self):
+        self.futures = {}  # id -> future
+        self.cache = None  # cache de quem vai abastecê-lo: a geração é lida antes do SELECT
+
+
+class UserLoader:
+    # singleflight + lote (estilo dataloader): buscas por id dentro da janela viram um só
+    # SELECT ... IN, e um id já pendente ou em execução reaproveita o mesmo future
+    def __init__(self, window: float, max_batch: int = 500):
+        self.window = window
+        self.max_batch = max_batch
+        self._waiting = {}  # bind -> {id: lote ainda na janela}
+        self._running = {}  # bind -> {id: future de um SELECT em andamento}
+        self._batches = {}  # bind -> lote aberto, ainda recebendo ids
+        self._tasks = set()
+
+    async def load(self, bind, user_id: int, cache=None, fresh: bool = False):
+        # (linha ou None, geração de `cache` lida antes do SELECT, ou None sem cache).
+        # fresh: não entra num SELECT já em andamento, que pode ter começado antes de uma
+        # escrita que esta requisição precisa ver; um lote ainda na janela serve
+        batch = self._waiting.get(bind, {}).get(user_id)
+        future = None if fresh else self._running.get(bind, {}).get(user_id)
+        if batch is None and future is None:
+            batch = self._enqueue(bind, user_id)
+        else:
+            loader_coalesced.inc()
+        if batch is not None:
+            future = batch.futures[user_id]
+            if cache is not None:
+                batch.cache = cache
+        # shield: um cliente que desiste não cancela a busca dos outros
+        return await asyncio.shield(future)
+
+    def _enqueue(self, bind, user_id: int):
+        batch = self._batches.get(bind)
+        if batch is None:
+            batch = self._batches[bind] = _Batch()
+            task = asyncio.create_task(self._dispatch(bind, batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        batch.futures[user_id] = asyncio.get_running_loop().create_future()
+        self._waiting.setdefault(bind, {})[user_id] = batch
+        if len(batch.futures) >= self.max_batch:
+            # lote cheio: o próximo id abre outro, este sai no fim da janela
+            del self._batches[bind]
+        return batch
+
+    async def _dispatch(self, bind, batch):
+        await asyncio.sleep(self.window)
+        if self._batches.get(bind) is batch:
+            del self._batches[bind]
+
+        waiting, running = self._waiting[bind], self._running.setdefault(bind, {})
+        for user_id, future in batch.futures.items():
+            del waiting[user_id]
+            running[user_id] = future
+        loader_batch_size.observe(len(batch.futures))
+        try:
+            # geração lida antes do SELECT: uma invalidação depois daqui faz o set() recusar a linha
+            ids = list(batch.futures)
+            generations = [None] * len(ids)
+            if batch.cache is not None:
+                generations = await asyncio.gather(*(batch.cache.generation(user_id) for user_id in ids))
+            async with AsyncSession(bind) as session:
+                rows = {row.id: row for row in await session.execute(select(*public_columns()).where(User.id.in_(ids)))}
+        except Exception as error:
+            for future in batch.futures.values():
+                future.set_exception(error)
+        else:
+            for user_id, generation in zip(ids, generations):
+                batch.futures[user_id].set_result((rows.get(user_id), generation))
+        finally:
+            for user_id, future in batch.futures.items():
+                if running.get(user_id) is future:
+                    del running[user_id]
+                # cancelado no shutdown: ninguém fica esperando para sempre
+                future.cancel()
@@ -0,0 +1,5 @@
+from fast_zero.app import create_app
+
+# ponto de entrada do `fastapi dev fast_zero/main.py`: só aqui as settings são lidas no import.
+# Com vários workers prefira `uvicorn --factory fast_zero.app:create_app`
+app = create_app()
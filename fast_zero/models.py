@@ -1,11 +1,16 @@
-from datetime import datetime
+from datetime import datetime, timezone
 
-from sqlalchemy import func
+from sqlalchemy import DDL, Column, DateTime, Index, Integer, String, Table, event, func
 from sqlalchemy.orm import Mapped, mapped_column, registry
 
 table_registry = registry()
 
 
+def _utcnow():
+    # com microssegundos: duas escritas no mesmo segundo ainda geram ETags diferentes
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
 @table_registry.mapped_as_dataclass
 class User:
     __tablename__ = 'users'
@@ -14,5 +19,71 @@ class User:
     username: Mapped[str] = mapped_column(unique=True)
     email: Mapped[str] = mapped_column(unique=True)
     password: Mapped[str]
-    created_at: Mapped[datetime] = mapped_column(init=False, server_default=func.now())
-    updated_at: Mapped[datetime] = mapped_column(init=False, server_default=func.now(), onupdate=func.now())
+    # datas no relógio da aplicação, com microssegundos: o CURRENT_TIMESTAMP do SQLite grava
+    # 'YYYY-MM-DD HH:MM:SS', que não compara como texto com o cursor (created_at, id) nem com
+    # o deleted_at de /users/changes
+    created_at: Mapped[datetime] = mapped_column(init=False, insert_default=_utcnow, server_default=func.now())
+    updated_at: Mapped[datetime] = mapped_column(init=False, insert_default=_utcnow, server_default=func.now(), onupdate=_utcnow)
+
+    __table_args__ = (
+        Index('ix_users_created_at_id', 'created_at', 'id'),
+        Index('ix_users_updated_at_id', 'updated_at', 'id'),
+    )
+
+
+# /token compara lower(email): sem esse índice, login sem diferenciar maiúsculas varre a tabela.
+# Único: A@x.com e a@x.com seriam o mesmo login para duas contas
+Index('ix_users_email_lower', func.lower(User.email), unique=True)
+
+
+# GET /users/search: FTS5 com trigramas (substring em username/email), sincronizado por triggers
+USERS_FTS_DDL = (
+    "CREATE VIRTUAL TABLE users_fts USING fts5(username, email, content='users', content_rowid='id', tokenize='trigram')",
+    """CREATE TRIGGER users_fts_insert AFTER INSERT ON users BEGIN
+        INSERT INTO users_fts(rowid, username, email) VALUES (new.id, new.username, new.email);
+    END""",
+    """CREATE TRIGGER users_fts_delete AFTER DELETE ON users BEGIN
+        INSERT INTO users_fts(users_fts, rowid, username, email) VALUES ('delete', old.id, old.username, old.email);
+    END""",
+    """CREATE TRIGGER users_fts_update AFTER UPDATE OF username, email ON users BEGIN
+        INSERT INTO users_fts(users_fts, rowid, username, email) VALUES ('delete', old.id, old.username, old.email);
+        INSERT INTO users_fts(rowid, username, email) VALUES (new.id, new.username, new.email);
+    END""",
+)
+
+for statement in USERS_FTS_DDL:
+    event.listen(User.__table__, 'after_create', DDL(statement).execute_if(dialect='sqlite'))
+event.listen(User.__table__, 'before_drop', DDL('DROP TABLE IF EXISTS users_fts').execute_if(dialect='sqlite'))
+
+# contagens mantidas por trigger: o total de GET /users/ nunca faz COUNT(*) na requisição
+table_counts = Table(
+    'table_counts',
+    table_registry.metadata,
+    Column('name', String, primary_key=True),
+    Column('row_count', Integer, nullable=False),
+)
+
+USERS_COUNT_DDL = (
+    "INSERT INTO table_counts (name, row_count) SELECT 'users', count(*) FROM users",
+    """CREATE TRIGGER users_count_insert AFTER INSERT ON users BEGIN
+        UPDATE table_counts SET row_count = row_count + 1 WHERE name = 'users';
+    END""",
+    """CREATE TRIGGER users_count_delete AFTER DELETE ON users BEGIN
+        UPDATE table_counts SET row_count = row_count - 1 WHERE name = 'users';
+    END""",
+)
+
+# os triggers ficam em users: table_counts tem que ser criada depois dela
+table_counts.add_is_dependent_on(User.__table__)
+for statement in USERS_COUNT_DDL:
+    event.listen(table_counts, 'after_create', DDL(statement).execute_if(dialect='sqlite'))
+
+# tombstones de delete_user para GET /users/changes (gravados no mesmo commit do DELETE)
+user_deletions = Table(
+    'user_deletions',
+    table_registry.metadata,
+    Column('id', Integer, primary_key=True),
+    Column('user_id', Integer, nullable=False),
+    Column('deleted_at', DateTime, nullable=False, default=_utcnow),
+    Index('ix_user_deletions_deleted_at_id', 'deleted_at', 'id'),
+)
@@ -0,0 +1,58 @@
+import base64
+import json
+from datetime import datetime
+from http import HTTPStatus
+
+from fastapi import HTTPException
+from sqlalchemy import select, tuple_
+
+from fast_zero.models import User, table_counts
+
+
+def encode_cursor(user: User, order_by: str):
+    payload = {'o': order_by, 'id': user.id}
+    if order_by == 'created_at':
+        payload['c'] = user.created_at.isoformat()
+    raw = json.dumps(payload, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b'=').decode()
+
+
+def decode_cursor(cursor: str, order_by: str):
+    invalid_cursor = HTTPException(status_code=HTTPStatus.BAD_REQUEST, detail='Invalid cursor')
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        last_id = int(payload['id'])
+        created_at = datetime.fromisoformat(payload['c']) if order_by == 'created_at' else None
+    except (ValueError, KeyError, TypeError):
+        raise invalid_cursor
+    if payload.get('o') != order_by:
+        raise invalid_cursor
+    return last_id, created_at
+
+
+def order_users(query, order_by: str):
+    if order_by == 'created_at':
+        return query.order_by(User.created_at, User.id)
+    return query.order_by(User.id)
+
+
+def seek_users(query, cursor: str, order_by: str):
+    # WHERE id > :last_id (ou (created_at, id) > (:c, :id)) usa o índice,
+    # em vez de varrer e descartar as linhas puladas como o OFFSET faz
+    last_id, created_at = decode_cursor(cursor, order_by)
+    if order_by == 'created_at':
+        return query.where(tuple_(User.created_at, User.id) > (created_at, last_id))
+    return query.where(User.id > last_id)
+
+
+def paginate_users(query, page):
+    # page: FilterPage; mesma ordem/posição para a consulta completa e para a de validação (ETag)
+    query = order_users(query, page.order_by)
+    query = seek_users(query, page.cursor, page.order_by) if page.cursor else query.offset(page.offset)
+    return query.limit(page.limit)
+
+
+async def total_users(session):
+    # uma linha de table_counts (mantida por trigger); None se o banco não mantém a contagem
+    return await session.scalar(select(table_counts.c.row_count).where(table_counts.c.name == 'users'))
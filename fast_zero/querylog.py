@@ -0,0 +1,89 @@
+import logging
+import time
+from contextvars import ContextVar
+
+from sqlalchemy import event
+
+from fast_zero.metrics import Histogram
+from fast_zero.settings import Settings
+
+logger = logging.getLogger('fast_zero.sql')
+
+db_query_seconds = Histogram('fast_zero_db_query_seconds', 'Time spent executing SQL statements.')
+
+
+class QueryStats:
+    __slots__ = ('count', 'seconds')
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+
+# estatísticas da requisição atual (o middleware cria uma por requisição)
+current_stats: ContextVar[QueryStats | None] = ContextVar('current_stats', default=None)
+
+
+def redact(parameters, executemany: bool):
+    # nunca loga valores (senhas, emails): só a forma dos parâmetros
+    if executemany:
+        return f'<{len(parameters)} rows>'
+    if isinstance(parameters, dict):
+        return dict.fromkeys(parameters, '?')
+    return ['?'] * len(parameters or ())
+
+
+def instrument_queries(engine, settings: Settings):
+    def before_cursor_execute(conn, **kw):
+        conn.info.setdefault('query_started_at', []).append(time.perf_counter())
+
+    def after_cursor_execute(conn, statement, parameters, executemany, **kw):
+        elapsed = time.perf_counter() - conn.info['query_started_at'].pop()
+        db_query_seconds.observe(elapsed)
+
+        stats = current_stats.get()
+        if stats is not None:
+            stats.count += 1
+            stats.seconds += elapsed
+
+        if elapsed * 1000 >= settings.SLOW_QUERY_MS:
+            logger.warning('slow query (%.1f ms): %s params=%s', elapsed * 1000, statement, redact(parameters, executemany))
+
+    def handle_error(exception_context):
+        # comando que falhou não passa por after_cursor_execute: sem isso o início dele fica
+        # na pilha da conexão (que volta ao pool) e o próximo comando mede a partir dele
+        conn = exception_context.connection
+        if conn is not None and conn.info.get('query_started_at'):
+            conn.info['query_started_at'].pop()
+
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute, named=True)
+    event.listen(engine, 'after_cursor_execute', after_cursor_execute, named=True)
+    event.listen(engine, 'handle_error', handle_error)
+
+
+class QueryStatsMiddleware:
+    def __init__(self, app, settings: Settings):
+        self.app = app
+        self.settings = settings
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = current_stats.set(stats)
+
+        async def send_with_headers(message):
+            if message['type'] == 'http.response.start' and self.settings.DEBUG:
+                message['headers'] = [
+                    *message.get('headers', ()),
+                    (b'x-db-query-count', str(stats.count).encode()),
+                    (b'x-db-query-time-ms', f'{stats.seconds * 1000:.2f}'.encode()),
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_headers)
+        finally:
+            current_stats.reset(token)
@@ -0,0 +1,93 @@
+import math
+import time
+
+from fast_zero.cache import TTLCache
+from fast_zero.metrics import Counter
+from fast_zero.settings import Settings
+
+login_failures = Counter('fast_zero_login_failures_total', 'Failed login attempts, by throttle key kind.', ('kind',))
+login_blocks = Counter('fast_zero_login_blocks_total', 'Times a throttle key was blocked after too many failures.', ('kind',))
+login_throttled = Counter('fast_zero_login_throttled_total', 'Login attempts answered 429 before any hashing.')
+
+
+class LoginThrottle:
+    # Janela deslizante de tentativas por chave (email, IP). Estourou o limite:
+    # bloqueia por base * 2^(bloqueios anteriores), até backoff_max.
+    # storage: qualquer objeto com get/set(key, value, ttl)/delete (padrão: TTLCache).
+    def __init__(self, storage, window: float, backoff_base: float, backoff_max: float):
+        self.storage = storage
+        self.window = window
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+    def reserve(self, keys: dict):
+        # checagem e reserva sem await no meio: numa rajada só `limit` tentativas por chave
+        # chegam ao hash. A reserva conta como falha até failure, success ou release
+        now = time.time()
+        states = {key: self._state(key, now) for key in keys}
+        blocked_until = max((state['blocked_until'] for state in states.values()), default=0)
+        if blocked_until > now:
+            return math.ceil(blocked_until - now)
+        if any(len(state['failures']) >= keys[key] for key, state in states.items()):
+            # limite tomado por tentativas que ainda estão verificando a senha
+            return 1
+        for key, state in states.items():
+            state['failures'].append(now)
+            self._store(key, state)
+        return 0
+
+    def failure(self, keys: dict):
+        # a reserva já está na janela: aqui só se decide o bloqueio
+        now = time.time()
+        for key, limit in keys.items():
+            kind = key.split(':', 1)[0]
+            login_failures.inc(kind=kind)
+            state = self._state(key, now)
+            if len(state['failures']) >= limit:
+                backoff = min(self.backoff_base * 2 ** state['strikes'], self.backoff_max)
+                state.update(failures=[], strikes=state['strikes'] + 1, blocked_until=now + backoff)
+                login_blocks.inc(kind=kind)
+            self._store(key, state)
+
+    def success(self, keys: dict):
+        # senha certa zera a chave do email (a primeira). As outras (IP) só devolvem a reserva
+        # desta tentativa: um login válido, de um NAT ou da conta do próprio atacante, não
+        # apaga as falhas contra outras contas vindas do mesmo endereço
+        email_key, *other_keys = keys
+        self.storage.delete(email_key)
+        self.release(other_keys)
+
+    def release(self, keys):
+        # tentativa que terminou sem veredito (503 do hash, erro de banco, cliente que desistiu):
+        # devolve a reserva sem contar falha nem mexer no bloqueio
+        now = time.time()
+        for key in keys:
+            state = self._state(key, now)
+            if state['failures']:
+                state['failures'].pop()
+                self._store(key, state)
+
+    def _state(self, key: str, now: float):
+        state = self.storage.get(key) or {'failures': [], 'strikes': 0, 'blocked_until': 0}
+        state['failures'] = [at for at in state['failures'] if at > now - self.window]
+        return state
+
+    def _store(self, key: str, state: dict):
+        # mantém o histórico de bloqueios enquanto o backoff ainda pode crescer
+        self.storage.set(key, state, ttl=max(self.window, self.backoff_max))
+
+
+def throttle_keys(email: str, client_ip: str | None, settings: Settings):
+    keys = {f'email:{email.strip().lower()}': settings.LOGIN_MAX_FAILURES_PER_EMAIL}
+    if client_ip:
+        keys[f'ip:{client_ip}'] = settings.LOGIN_MAX_FAILURES_PER_IP
+    return keys
+
+
+def build_login_throttle(settings: Settings):
+    return LoginThrottle(
+        TTLCache('login_throttle', maxsize=100_000, ttl=settings.LOGIN_WINDOW_SECONDS),
+        window=settings.LOGIN_WINDOW_SECONDS,
+        backoff_base=settings.LOGIN_BACKOFF_BASE_SECONDS,
+        backoff_max=settings.LOGIN_BACKOFF_MAX_SECONDS,
+    )
@@ -0,0 +1,27 @@
+from fast_zero.models import User
+
+# o que UserPublic expõe: só essas colunas saem do banco no caminho rápido
+PUBLIC_COLUMNS = (User.id, User.username, User.email)
+PUBLIC_FIELDS = tuple(column.key for column in PUBLIC_COLUMNS)
+
+
+def sparse_fields(fields):
+    # ?fields= na ordem do UserPublic; None quando pede tudo (mesmo ETag de sem ?fields=)
+    if fields is None:
+        return None
+    chosen = tuple(field for field in PUBLIC_FIELDS if field in fields)
+    return None if chosen == PUBLIC_FIELDS else chosen
+
+
+def public_columns(order_by: str = 'id', fields=None):
+    # id e updated_at (cursor/ETag) e, no cursor por created_at, created_at: lidos mesmo fora da resposta
+    selected = PUBLIC_COLUMNS if fields is None else tuple(getattr(User, field) for field in fields)
+    columns = (User.id, *(column for column in selected if column.key != 'id'), User.updated_at)
+    return (*columns, User.created_at) if order_by == 'created_at' else columns
+
+
+def public_row(row, fields=None):
+    # dados que nós mesmos gravamos: não passam de novo pelo EmailStr do UserPublic
+    if fields is None:
+        return {'id': row.id, 'username': row.username, 'email': row.email}
+    return {field: getattr(row, field) for field in fields}
@@ -1,4 +1,7 @@
-from pydantic import BaseModel, ConfigDict, EmailStr
+from datetime import datetime
+from typing import Literal
+
+from pydantic import BaseModel, ConfigDict, EmailStr, Field, field_validator
 
 
 class Message(BaseModel):
@@ -18,8 +21,89 @@ class UserPublic(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+class UserBulkResult(BaseModel):
+    username: str
+    email: str
+    status: Literal['created', 'conflict']
+    id: int | None = None
+    detail: str | None = None
+
+
+class UserBulkList(BaseModel):
+    results: list[UserBulkResult]
+
+
 class UserList(BaseModel):
     users: list[UserPublic]
+    next_cursor: str | None = None
+    total: int | None = None
+
+
+class UserBatch(BaseModel):
+    users: list[UserPublic]
+    missing: list[int]
+
+
+def _split_commas(value):
+    # aceita ?x=1&x=2 e ?x=1,2
+    values = value if isinstance(value, list) else [value]
+    return [part.strip() for item in values for part in str(item).split(',') if part.strip()]
+
+
+class UserBatchQuery(BaseModel):
+    ids: list[int] = Field(min_length=1)
+
+    @field_validator('ids', mode='before')
+    @classmethod
+    def split_ids(cls, value):
+        return _split_commas(value)
+
+
+class FieldSelection(BaseModel):
+    # ?fields=id,email: só essas colunas saem do banco e da resposta
+    fields: list[Literal['id', 'username', 'email']] | None = Field(None, min_length=1)
+
+    @field_validator('fields', mode='before')
+    @classmethod
+    def split_fields(cls, value):
+        return None if value is None else _split_commas(value)
+
+
+class UserChangesQuery(BaseModel):
+    since: datetime | None = None
+    cursor: str | None = None
+    limit: int = Field(100, ge=1, le=1000)
+
+
+class UserVersion(UserPublic):
+    updated_at: datetime
+
+
+class UserTombstone(BaseModel):
+    id: int
+    deleted_at: datetime
+
+
+class UserChanges(BaseModel):
+    # aplique deleted antes de users: users só traz o estado atual de cada id
+    users: list[UserVersion]
+    deleted: list[UserTombstone]
+    next_cursor: str | None = None
+    has_more: bool
+
+
+class FilterPage(FieldSelection):
+    limit: int = 10
+    offset: int = 0
+    cursor: str | None = None
+    order_by: Literal['id', 'created_at'] = 'id'
+    include_total: bool = False
+
+
+class UserSearch(BaseModel):
+    q: str = Field(min_length=1, max_length=100)
+    limit: int = Field(10, ge=1, le=100)
+    offset: int = Field(0, ge=0)
 
 
 class JWToken(BaseModel):
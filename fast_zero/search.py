@@ -0,0 +1,31 @@
+from sqlalchemy import case, column, func, literal_column, or_, table
+
+from fast_zero.models import User
+
+# trigramas: termos menores que isso não casam no FTS5
+MIN_FTS_LENGTH = 3
+
+users_fts = table('users_fts', column('rowid'), column('rank'))
+
+
+def _phrase(term: str):
+    # uma frase FTS5 entre aspas: operadores e aspas do usuário viram texto
+    return '"' + term.replace('"', '""') + '"'
+
+
+def search_users(query, term: str, dialect: str):
+    # exato > prefixo > substring; dentro de cada faixa, bm25 (rank) e id
+    exact = or_(func.lower(User.username) == term.lower(), func.lower(User.email) == term.lower())
+    prefix = or_(User.username.istartswith(term, autoescape=True), User.email.istartswith(term, autoescape=True))
+    relevance = case((exact, 0), (prefix, 1), else_=2)
+
+    if dialect == 'sqlite' and len(term) >= MIN_FTS_LENGTH:
+        return (
+            query.join(users_fts, users_fts.c.rowid == User.id)
+            .where(literal_column('users_fts').op('MATCH')(_phrase(term)))
+            .order_by(relevance, users_fts.c.rank, User.id)
+        )
+
+    # termo curto ou banco sem FTS5: varredura com LIKE
+    substring = or_(User.username.icontains(term, autoescape=True), User.email.icontains(term, autoescape=True))
+    return query.where(substring).order_by(relevance, User.id)
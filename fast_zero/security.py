@@ -1,16 +1,20 @@
+import hashlib
+import time
 from datetime import datetime, timedelta
 from http import HTTPStatus
 from zoneinfo import ZoneInfo
 
-from fastapi import Depends, HTTPException
+from fastapi import Depends, HTTPException, Request
 from fastapi.security import OAuth2PasswordBearer
 from jwt import DecodeError, decode, encode
-from pwdlib import PasswordHash
 from sqlalchemy import select
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
 
-from fast_zero.database import get_session
+from fast_zero.cache import CacheBackend, TTLCache
+from fast_zero.database import get_read_session, get_session
 from fast_zero.models import User
+from fast_zero.settings import Settings
 
 SECRET_KEY = 'Your-secret-key'
 ALGORITHM = 'HS256'
@@ -19,15 +23,16 @@ ACCESS_TOKEN_EXPIRE_MINUTES = 30
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl='token')
 
 
-pwd_context = PasswordHash.recommended()
-
-
-def get_password_hash(password: str):
-    return pwd_context.hash(password)
-
-
-def verify_password(plain_password: str, hashed_password: str):
-    return pwd_context.verify(plain_password, hashed_password)
+def build_auth_caches(settings: Settings, backend: CacheBackend):
+    return (
+        # usuário autenticado por subject (email) do token; update/delete invalidam em todos os
+        # workers. Em memory fica desligado por padrão: o token de um usuário apagado ou com outro
+        # email seguiria valendo nos outros workers até o TTL
+        backend.cache('principal', maxsize=settings.USER_CACHE_MAXSIZE, ttl=settings.USER_CACHE_TTL_SECONDS),
+        # payload já verificado por digest do token; cada entrada expira no próprio exp.
+        # Fica sempre no processo: refazer o HMAC custa menos que ir ao cache compartilhado
+        TTLCache('token', maxsize=settings.TOKEN_CACHE_MAXSIZE, ttl=ACCESS_TOKEN_EXPIRE_MINUTES * 60),
+    )
 
 
 def create_access_token(data: dict):
@@ -40,20 +45,66 @@ def create_access_token(data: dict):
     return encoded_jwt
 
 
-def get_current_user(session: Session = Depends(get_session), token: str = Depends(oauth2_scheme)):
+async def get_current_user(request: Request, session: AsyncSession = Depends(get_session), token: str = Depends(oauth2_scheme)):
+    return await _authenticate(request.app.state, session, token)
+
+
+async def get_current_reader(request: Request, session: AsyncSession = Depends(get_read_session), token: str = Depends(oauth2_scheme)):
+    # mesma autenticação, mas a consulta vai para uma réplica de leitura
+    return await _authenticate(request.app.state, session, token)
+
+
+async def _authenticate(state, session: AsyncSession, token: str):
     credencials_exception = HTTPException(
         status_code=HTTPStatus.UNAUTHORIZED,
         detail='Could not validate credentials',
         headers={'WWW-Authenticate': 'Bearer'},
     )
     try:
-        payload = decode(token, SECRET_KEY, algorithms=ALGORITHM)
+        payload = _decode_token(token, state.token_cache)
         subject_email = payload.get('sub')
         if not subject_email:
             raise credencials_exception
     except DecodeError:
         raise credencials_exception
-    user = session.scalar(select(User).where(User.email == subject_email))
+
+    cached = await state.user_cache.get(subject_email)
+    if cached is not None:
+        # merge(load=False) anexa a cópia à sessão sem ir ao banco; o hash da senha não
+        # está no cache, então fica expirado: quem precisar dele vai ao banco
+        user = await session.merge(_user_from_cache(cached), load=False)
+        session.expire(user, ['password'])
+        return user
+
+    generation = await state.user_cache.generation(subject_email)
+    user = await session.scalar(select(User).where(User.email == subject_email))
     if not user:
         raise credencials_exception
+    # réplica atrasada pode devolver a linha antiga sob a geração nova: só o primário enche o cache
+    if generation is not None and session.bind not in state.db.replicas:
+        await state.user_cache.set(subject_email, _user_to_cache(user), generation=generation)
+    return user
+
+
+def _decode_token(token: str, token_cache: TTLCache):
+    digest = hashlib.sha256(token.encode()).digest()
+    payload = token_cache.get(digest)
+    if payload is None:
+        payload = decode(token, SECRET_KEY, algorithms=ALGORITHM)
+        if 'exp' in payload:
+            token_cache.set(digest, payload, ttl=payload['exp'] - time.time())
+    return payload
+
+
+def _user_to_cache(user: User):
+    # o hash da senha não sai do banco: o cache pode ser um arquivo ou um Redis compartilhado
+    return {column.key: getattr(user, column.key) for column in User.__table__.columns if column.key != 'password'}
+
+
+def _user_from_cache(data: dict):
+    user = User(username=data['username'], email=data['email'], password='')
+    user.id = data['id']
+    user.created_at = data['created_at']
+    user.updated_at = data['updated_at']
+    make_transient_to_detached(user)
     return user
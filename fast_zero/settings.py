@@ -1,6 +1,77 @@
+from typing import Literal
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
 class Settings(BaseSettings):
     model_config = SettingsConfigDict(env_file='.env', env_file_encoding='utf-8')
     DATABASE_URL: str
+    # réplicas só de leitura, ex.: '["sqlite+aiosqlite:///replica.db"]'
+    DATABASE_REPLICA_URLS: list[str] = []
+    # depois de uma escrita, o cliente lê do primário por este tempo
+    READ_PRIMARY_PIN_SECONDS: int = 5
+
+    # modo debug: X-DB-Query-Count / X-DB-Query-Time-Ms em cada resposta
+    DEBUG: bool = False
+    # statements acima disso vão para o log 'fast_zero.sql' (parâmetros ocultos)
+    SLOW_QUERY_MS: float = 100
+    # leituras de usuário via orjson, só com as colunas públicas e sem revalidar o que veio do banco
+    FAST_RESPONSES: bool = False
+
+    # pool de conexões (ignorado para SQLite em memória)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+
+    # PRAGMAs aplicados em cada conexão SQLite nova
+    SQLITE_JOURNAL_MODE: Literal['DELETE', 'TRUNCATE', 'PERSIST', 'MEMORY', 'WAL', 'OFF'] = 'WAL'
+    SQLITE_SYNCHRONOUS: Literal['OFF', 'NORMAL', 'FULL', 'EXTRA'] = 'NORMAL'
+    SQLITE_CACHE_SIZE: int = -64_000  # negativo = KiB
+    SQLITE_MMAP_SIZE: int = 256 * 1024 * 1024
+    SQLITE_BUSY_TIMEOUT_MS: int = 5_000
+
+    # processos dedicados ao Argon2 (0 = threadpool do event loop)
+    HASH_WORKERS: int = 2
+    # jobs aguardando além dos que estão rodando; acima disso responde 503
+    HASH_QUEUE_SIZE: int = 64
+    # custos do Argon2id; hashes antigos são atualizados no próximo login
+    ARGON2_TIME_COST: int = 3
+    ARGON2_MEMORY_COST: int = 65_536  # KiB
+    ARGON2_PARALLELISM: int = 4
+
+    # onde ficam os caches de usuário: memory (um por worker), sqlite (arquivo compartilhado
+    # pelos workers da máquina; em /dev/shm fica na RAM) ou redis (qualquer servidor RESP)
+    CACHE_BACKEND: Literal['memory', 'sqlite', 'redis'] = 'memory'
+    # caminho do arquivo SQLite (padrão $XDG_CACHE_HOME/fast_zero/cache.db, só o dono lê) ou redis://[:senha@]host:6379/0
+    CACHE_URL: str = ''
+    # acima disso o Redis conta como fora do ar e a consulta vai ao banco
+    CACHE_TIMEOUT_SECONDS: float = 0.05
+    # GET /users/{id} por id; PUT/DELETE invalidam (0 desliga). Sem valor: 10_000 com backend
+    # compartilhado e desligado em memory, onde a invalidação não chega aos outros workers
+    READ_CACHE_MAXSIZE: int | None = None
+    READ_CACHE_TTL_SECONDS: float = 30
+    # cache do usuário autenticado em get_current_user (0 desliga). Sem valor: como o
+    # READ_CACHE_MAXSIZE, desligado em memory; com um worker só, pode ligar com segurança
+    USER_CACHE_MAXSIZE: int | None = None
+    USER_CACHE_TTL_SECONDS: float = 60
+    # tokens já verificados (HMAC + JSON) mantidos até o exp de cada um
+    TOKEN_CACHE_MAXSIZE: int = 10_000
+
+    # itens aceitos por chamada em POST /users/bulk
+    BULK_MAX_USERS: int = 10_000
+    # GET /users/changes só entrega mudanças com pelo menos esta idade (commits fora de ordem);
+    # no SQLite soma-se SQLITE_BUSY_TIMEOUT_MS, o quanto um commit pode esperar pela trava
+    CHANGES_LAG_SECONDS: float = 1
+    # ids aceitos por chamada em GET /users/batch
+    BATCH_MAX_IDS: int = 100
+    # GET /users/{id} concorrentes dentro dessa janela dividem um único SELECT ... IN
+    USER_LOADER_WINDOW_MS: float = 1
+
+    # throttling do /token: falhas por janela deslizante, depois backoff exponencial
+    LOGIN_MAX_FAILURES_PER_EMAIL: int = 5
+    LOGIN_MAX_FAILURES_PER_IP: int = 50
+    LOGIN_WINDOW_SECONDS: float = 300
+    LOGIN_BACKOFF_BASE_SECONDS: float = 30
+    LOGIN_BACKOFF_MAX_SECONDS: float = 900
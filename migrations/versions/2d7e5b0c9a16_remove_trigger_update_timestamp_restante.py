@@ -0,0 +1,51 @@
+"""remove trigger update_timestamp restante
+
+Revision ID: 2d7e5b0c9a16
+Revises: f1c9a4e7b382
+Create Date: 2026-10-19 14:37:20.918244
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from fast_zero.backfill import Backfill, run_backfill
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2d7e5b0c9a16'
+down_revision: Union[str, None] = 'f1c9a4e7b382'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    # bancos que passaram de ca5821bad3c3 antes dela remover o trigger: ele reescreveu
+    # updated_at sem fração de segundo no backfill de e4a7c2b9d310 e em cada escrita depois
+    op.execute('DROP TRIGGER IF EXISTS update_timestamp')
+    users = sa.Table(
+        'users',
+        sa.MetaData(),
+        sa.Column('id', sa.Integer, primary_key=True),
+        sa.Column('updated_at', sa.String),
+    )
+    with op.get_context().autocommit_block():
+        run_backfill(
+            op.get_bind(),
+            Backfill(
+                'users_updated_at_microseconds_after_trigger',
+                users,
+                {'updated_at': users.c.updated_at + '.000000'},
+                where=sa.func.length(users.c.updated_at) == 19,
+            ),
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # o trigger nunca foi de nenhuma migração: não há o que recriar
+    pass
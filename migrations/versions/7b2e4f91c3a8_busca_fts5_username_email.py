@@ -0,0 +1,57 @@
+"""busca fts5 username email
+
+Revision ID: 7b2e4f91c3a8
+Revises: 5c1f0a7d2e94
+Create Date: 2026-10-18 14:03:11.527310
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7b2e4f91c3a8'
+down_revision: Union[str, None] = '5c1f0a7d2e94'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # FTS5 é só do SQLite; nos outros bancos /users/search cai no LIKE
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    op.execute(
+        "CREATE VIRTUAL TABLE users_fts USING fts5("
+        "username, email, content='users', content_rowid='id', tokenize='trigram')"
+    )
+    op.execute(
+        """CREATE TRIGGER users_fts_insert AFTER INSERT ON users BEGIN
+            INSERT INTO users_fts(rowid, username, email) VALUES (new.id, new.username, new.email);
+        END"""
+    )
+    op.execute(
+        """CREATE TRIGGER users_fts_delete AFTER DELETE ON users BEGIN
+            INSERT INTO users_fts(users_fts, rowid, username, email) VALUES ('delete', old.id, old.username, old.email);
+        END"""
+    )
+    op.execute(
+        """CREATE TRIGGER users_fts_update AFTER UPDATE OF username, email ON users BEGIN
+            INSERT INTO users_fts(users_fts, rowid, username, email) VALUES ('delete', old.id, old.username, old.email);
+            INSERT INTO users_fts(rowid, username, email) VALUES (new.id, new.username, new.email);
+        END"""
+    )
+    # indexa os usuários que já existem
+    op.execute("INSERT INTO users_fts(users_fts) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    op.execute('DROP TRIGGER IF EXISTS users_fts_update')
+    op.execute('DROP TRIGGER IF EXISTS users_fts_delete')
+    op.execute('DROP TRIGGER IF EXISTS users_fts_insert')
+    op.execute('DROP TABLE IF EXISTS users_fts')
@@ -0,0 +1,42 @@
+"""indices email normalizado e updated_at
+
+Revision ID: 8f3b1d6a2c59
+Revises: 3d8a6c0e5f17
+Create Date: 2026-10-18 16:41:05.226871
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8f3b1d6a2c59'
+down_revision: Union[str, None] = '3d8a6c0e5f17'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = (
+    ('ix_users_email_lower', [sa.text('lower(email)')]),
+    ('ix_users_updated_at_id', ['updated_at', 'id']),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # no PostgreSQL o índice é criado sem travar escritas (CONCURRENTLY não roda em transação);
+    # no SQLite cada índice é um comando só
+    concurrently = op.get_bind().dialect.name == 'postgresql'
+    for name, columns in INDEXES:
+        if concurrently:
+            with op.get_context().autocommit_block():
+                op.create_index(name, 'users', columns, unique=False, postgresql_concurrently=True)
+        else:
+            op.create_index(name, 'users', columns, unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name, _ in reversed(INDEXES):
+        op.drop_index(name, table_name='users')
@@ -0,0 +1,50 @@
+"""created_at com microssegundos
+
+Revision ID: b6d1e8f4a273
+Revises: e4a7c2b9d310
+Create Date: 2026-10-19 10:12:54.318870
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from fast_zero.backfill import Backfill, run_backfill
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b6d1e8f4a273'
+down_revision: Union[str, None] = 'e4a7c2b9d310'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_bind().dialect.name != 'sqlite':
+        return
+    # created_at vindo do CURRENT_TIMESTAMP não tem fração de segundo: o cursor de
+    # GET /users/?order_by=created_at compara como texto e pulava o resto do segundo
+    users = sa.Table(
+        'users',
+        sa.MetaData(),
+        sa.Column('id', sa.Integer, primary_key=True),
+        sa.Column('created_at', sa.String),
+    )
+    with op.get_context().autocommit_block():
+        run_backfill(
+            op.get_bind(),
+            Backfill(
+                'users_created_at_microseconds',
+                users,
+                {'created_at': users.c.created_at + '.000000'},
+                where=sa.func.length(users.c.created_at) == 19,
+            ),
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # o formato com fração continua legível pelo SQLAlchemy: nada a desfazer
+    pass
@@ -20,13 +20,14 @@ depends_on: Union[str, Sequence[str], None] = None
 
 def upgrade() -> None:
     """Upgrade schema."""
-    # ### commands auto generated by Alembic - please adjust! ###
-    pass
-    # ### end Alembic commands ###
+    # o trigger update_timestamp foi criado à mão (d0f27ff5b760 ficou vazia) e segue em bancos
+    # como o database.db: grava updated_at = CURRENT_TIMESTAMP, sem fração de segundo, em todo
+    # UPDATE, inclusive nos backfills das migrações seguintes. updated_at é do ORM agora
+    if op.get_bind().dialect.name == 'sqlite':
+        op.execute('DROP TRIGGER IF EXISTS update_timestamp')
 
 
 def downgrade() -> None:
     """Downgrade schema."""
-    # ### commands auto generated by Alembic - please adjust! ###
+    # nenhuma migração criou o trigger: não há o que recriar
     pass
-    # ### end Alembic commands ###
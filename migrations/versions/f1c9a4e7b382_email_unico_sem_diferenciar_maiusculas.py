@@ -0,0 +1,47 @@
+"""email unico sem diferenciar maiusculas
+
+Revision ID: f1c9a4e7b382
+Revises: b6d1e8f4a273
+Create Date: 2026-10-18 21:12:44.503118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f1c9a4e7b382'
+down_revision: Union[str, None] = 'b6d1e8f4a273'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _recreate_email_index(unique: bool) -> None:
+    # mesmo esquema de 8f3b1d6a2c59: CONCURRENTLY no PostgreSQL, comando simples no SQLite
+    concurrently = op.get_bind().dialect.name == 'postgresql'
+    if concurrently:
+        with op.get_context().autocommit_block():
+            op.drop_index('ix_users_email_lower', table_name='users', postgresql_concurrently=True)
+            op.create_index('ix_users_email_lower', 'users', [sa.text('lower(email)')], unique=unique, postgresql_concurrently=True)
+    else:
+        op.drop_index('ix_users_email_lower', table_name='users')
+        op.create_index('ix_users_email_lower', 'users', [sa.text('lower(email)')], unique=unique)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # contas que só diferem em maiúsculas precisam ser resolvidas à mão antes: não há como
+    # escolher aqui qual delas fica com o email
+    duplicates = op.get_bind().execute(
+        sa.text('SELECT lower(email) FROM users GROUP BY lower(email) HAVING count(*) > 1 LIMIT 10')
+    ).scalars().all()
+    if duplicates:
+        raise RuntimeError(f'emails duplicados sem diferenciar maiúsculas, resolva antes de migrar: {", ".join(duplicates)}')
+    _recreate_email_index(unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    _recreate_email_index(unique=False)
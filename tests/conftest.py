@@ -3,38 +3,56 @@ from datetime import datetime
 from http import HTTPStatus
 
 import pytest
+import pytest_asyncio
 from fastapi.testclient import TestClient
 from jwt import decode, encode
-from sqlalchemy import create_engine, event
-from sqlalchemy.orm import Session
-from sqlalchemy.pool import StaticPool
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from fast_zero.app import app
-from fast_zero.database import get_session
+from fast_zero.app import create_app
+from fast_zero.database import build_engine, get_read_session, get_session
+from fast_zero.hashing import argon2_costs, get_password_hash
 from fast_zero.models import User, table_registry
-from fast_zero.security import get_password_hash
+from fast_zero.settings import Settings
+
+
+@pytest_asyncio.fixture
+async def session():
+    engine = build_engine(Settings(DATABASE_URL='sqlite+aiosqlite:///:memory:'))
+    async with engine.begin() as conn:
+        await conn.run_sync(table_registry.metadata.create_all)
+
+    async with AsyncSession(engine, expire_on_commit=False) as session:
+        yield session
+
+    async with engine.begin() as conn:
+        await conn.run_sync(table_registry.metadata.drop_all)
+    await engine.dispose()
 
 
 @pytest.fixture
-def session():
-    engine = create_engine(
-        'sqlite:///:memory:',
-        connect_args={'check_same_thread': False},
-        poolclass=StaticPool,
+def settings():
+    # um objeto por teste: monkeypatch nele vale só para o app deste teste. Hash no threadpool
+    # e com custos mínimos: cada login não sobe processos nem gasta 64 MiB de Argon2
+    # (o pool de processos tem seu próprio teste em test_hashing.py)
+    return Settings(
+        DATABASE_URL='sqlite+aiosqlite:///:memory:',
+        HASH_WORKERS=0,
+        ARGON2_TIME_COST=1,
+        ARGON2_MEMORY_COST=1024,
+        ARGON2_PARALLELISM=1,
     )
-    table_registry.metadata.create_all(engine)
-    with Session(engine) as session:
-        yield session
-    table_registry.metadata.drop_all(engine)
 
 
 @pytest.fixture
-def client(session):
+def client(session, settings):
     def get_session_overrise():
         return session
 
+    app = create_app(settings)
     with TestClient(app) as client:
         app.dependency_overrides[get_session] = get_session_overrise
+        app.dependency_overrides[get_read_session] = get_session_overrise
         yield client
     app.dependency_overrides.clear()
 
@@ -59,13 +77,13 @@ def datetime_fake_vindo_banco():
     return _datetime_fake_vindo_banco
 
 
-@pytest.fixture
-def user(session: Session):
+@pytest_asyncio.fixture
+async def user(session: AsyncSession, settings):
     password = 'secret'
-    user = User(username='Teste', email='test@test.com', password=get_password_hash(password))
+    user = User(username='Teste', email='test@test.com', password=get_password_hash(password, argon2_costs(settings)))
     session.add(user)
-    session.commit()
-    session.refresh(user)
+    await session.commit()
+    await session.refresh(user)
 
     user.clean_password = password
 
@@ -78,17 +96,17 @@ def token(client, user):
     return response.json()['access_token']
 
 
-@pytest.fixture
-def other_user(session: Session):
+@pytest_asyncio.fixture
+async def other_user(session: AsyncSession, settings):
     password = 'other_secret'
     user = User(
         username='OtherUser',
         email='other@test.com',
-        password=get_password_hash(password),
+        password=get_password_hash(password, argon2_costs(settings)),
     )
     session.add(user)
-    session.commit()
-    session.refresh(user)
+    await session.commit()
+    await session.refresh(user)
     user.clean_password = password
     return user
 
@@ -1,10 +1,17 @@
+import json
 from http import HTTPStatus
 
-from sqlalchemy import select
+import pytest
+from pwdlib.hashers.argon2 import Argon2Hasher
+from sqlalchemy import insert, select, text
 
+from fast_zero.cache import MemoryCache
+from fast_zero.hashing import verify_password
 from fast_zero.models import User
 from fast_zero.schemas import UserPublic
 
+SAME_SECOND_USERS = 5
+
 
 def test_read_root_deve_retornar_ok_e_ola_mundo(client):
     # Arrange (Organização)
@@ -54,7 +61,105 @@ def test_get_users(client, token, user):
     response = client.get('/users/', headers={'Authorization': f'Bearer {token}'})
 
     assert response.status_code == HTTPStatus.OK
-    assert response.json() == {'users': [user_schema]}
+    assert response.json() == {'users': [user_schema], 'next_cursor': None, 'total': None}
+
+
+def test_get_users_total_follows_writes(client, token, other_token, user, other_user):
+    params = {'limit': 1, 'include_total': True}
+    response = client.get('/users/', params=params, headers={'Authorization': f'Bearer {token}'})
+    assert response.json()['total'] == len([user, other_user])
+
+    client.post('/users/', json={'username': 'novo', 'email': 'novo@test.com', 'password': 'secret'})
+    client.delete(f'/users/{user.id}', headers={'Authorization': f'Bearer {token}'})
+    response = client.get('/users/', params=params, headers={'Authorization': f'Bearer {other_token}'})
+
+    assert response.json()['total'] == len([other_user, 'novo'])
+
+
+@pytest.mark.asyncio
+async def test_get_users_cursor_pagination(client, session, token, user):
+    session.add_all([User(username=f'user{i}', email=f'user{i}@test.com', password='secret') for i in range(3)])
+    await session.commit()
+
+    ids = []
+    cursor = None
+    while True:
+        params = {'limit': 2, 'cursor': cursor} if cursor else {'limit': 2}
+        response = client.get('/users/', params=params, headers={'Authorization': f'Bearer {token}'})
+        assert response.status_code == HTTPStatus.OK
+        ids += [u['id'] for u in response.json()['users']]
+        cursor = response.json()['next_cursor']
+        if not cursor:
+            break
+
+    assert ids == [1, 2, 3, 4]
+
+
+@pytest.mark.asyncio
+async def test_get_users_cursor_order_by_created_at(client, session, token, user, datetime_fake_vindo_banco):
+    with datetime_fake_vindo_banco(model=User):
+        session.add(User(username='older', email='older@test.com', password='secret'))
+        await session.commit()
+
+    response = client.get('/users/', params={'limit': 1, 'order_by': 'created_at'}, headers={'Authorization': f'Bearer {token}'})
+    assert response.json()['users'][0]['username'] == 'older'
+
+    response = client.get(
+        '/users/',
+        params={'limit': 1, 'order_by': 'created_at', 'cursor': response.json()['next_cursor']},
+        headers={'Authorization': f'Bearer {token}'},
+    )
+    assert response.json()['users'][0]['username'] == user.username
+
+
+@pytest.mark.asyncio
+async def test_get_users_cursor_order_by_created_at_same_second(client, session, token, user):
+    # sem o hook de datas falsas: todos gravados no mesmo segundo, pelo caminho normal de INSERT
+    await session.execute(insert(User), [{'username': f'u{i}', 'email': f'u{i}@test.com', 'password': 'x'} for i in range(SAME_SECOND_USERS)])
+    await session.commit()
+
+    ids, cursor = [], None
+    while True:
+        params = {'limit': 2, 'order_by': 'created_at', **({'cursor': cursor} if cursor else {})}
+        response = client.get('/users/', params=params, headers={'Authorization': f'Bearer {token}'})
+        ids += [row['id'] for row in response.json()['users']]
+        cursor = response.json()['next_cursor']
+        if not cursor:
+            break
+
+    assert ids == list(range(1, SAME_SECOND_USERS + 2))
+
+
+@pytest.mark.parametrize('order_by', ['id', 'created_at'])
+def test_get_users_fast_responses_match_validated_path(client, token, other_user, order_by, settings):
+    params = {'limit': 1, 'order_by': order_by}
+    headers = {'Authorization': f'Bearer {token}'}
+    validated = client.get('/users/', params=params, headers=headers).json()
+
+    settings.FAST_RESPONSES = True
+    response = client.get('/users/', params=params, headers=headers)
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers['content-type'] == 'application/json'
+    assert response.json() == validated
+    next_page = client.get('/users/', params={**params, 'cursor': validated['next_cursor']}, headers=headers)
+    assert next_page.json()['users'] != validated['users']
+
+
+def test_get_user_fast_responses(client, user, monkeypatch, settings):
+    monkeypatch.setattr(settings, 'FAST_RESPONSES', True)
+
+    response = client.get(f'/users/{user.id}')
+    assert response.json() == {'id': user.id, 'username': user.username, 'email': user.email}
+
+    response = client.get(f'/users/{user.id + 1}')
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+def test_get_users_invalid_cursor(client, token):
+    response = client.get('/users/', params={'cursor': 'nao-e-um-cursor'}, headers={'Authorization': f'Bearer {token}'})
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert response.json() == {'detail': 'Invalid cursor'}
 
 
 def test_update_user(client, user, token):
@@ -81,6 +186,29 @@ def test_delete_user(client, user, token):
     assert response.json() == {'message': 'User deleted'}
 
 
+def test_delete_user_invalidates_read_cache(client, user, token, monkeypatch):
+    monkeypatch.setattr(client.app.state, 'read_cache', MemoryCache('users', maxsize=10, ttl=60))
+    client.get(f'/users/{user.id}')
+    client.delete(f'/users/{user.id}', headers={'Authorization': f'Bearer {token}'})
+    # outro cliente, sem o cookie que fixa a leitura no primário
+    client.cookies.clear()
+
+    response = client.get(f'/users/{user.id}')
+
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+def test_delete_other_user(client, user, other_user, token):
+    headers = {'Authorization': f'Bearer {token}'}
+
+    response = client.delete(f'/users/{other_user.id}', headers=headers)
+    assert response.status_code == HTTPStatus.FORBIDDEN
+
+    response = client.delete(f'/users/{max(user.id, other_user.id) + 1}', headers=headers)
+    assert response.status_code == HTTPStatus.NOT_FOUND
+    assert response.json() == {'detail': 'User not found'}
+
+
 def test_update_integrity_error(client, user, token):
     # inserindo fausto
     client.post(
@@ -133,6 +261,28 @@ def test_create_user_duplicate_email(client, user, token):
     assert response.json() == {'detail': 'Email already exists'}
 
 
+def test_email_differing_only_in_case_is_a_conflict(client, user, token):
+    email = user.email.upper()
+    response = client.post('/users/', json={'username': 'newuser', 'email': email, 'password': '123'})
+    assert response.status_code == HTTPStatus.CONFLICT
+    assert response.json() == {'detail': 'Email already exists'}
+
+    response = client.post(
+        '/users/bulk',
+        headers={'Authorization': f'Bearer {token}'},
+        json=[
+            {'username': 'alice', 'email': email, 'password': '123'},
+            {'username': 'bob', 'email': 'Bob@exemplo.com', 'password': '123'},
+            {'username': 'bob2', 'email': 'bob@exemplo.com', 'password': '123'},
+        ],
+    )
+    assert [(r['status'], r['detail']) for r in response.json()['results']] == [
+        ('conflict', 'Email already exists'),
+        ('created', None),
+        ('conflict', 'Email already exists'),
+    ]
+
+
 def test_token_sem_email(client, token_sem_email):
     response = client.post('/token', headers={token_sem_email})
     print(response)
@@ -140,10 +290,11 @@ def test_token_sem_email(client, token_sem_email):
     assert response.json() == {'detail': 'User not found'}
 
 
-def test_get_user_persistence(client, session, token):
+@pytest.mark.asyncio
+async def test_get_user_persistence(client, session, token):
     new_user = User(username='persist', email='persist@test.com', password='secret')
     session.add(new_user)
-    session.commit()
+    await session.commit()
     response = client.get(f'/users/{new_user.id}', headers={'Authorization': f'Bearer {token}'})
     assert response.status_code == HTTPStatus.OK
     assert response.json() == {
@@ -162,22 +313,37 @@ def test_get_token(client, user):
     assert 'access_token' in token
 
 
-def test_delete_user_not_found(client, session):
-    user_to_delete = session.scalar(select(User).where(User.id == 1))
+def test_get_token_ignores_email_case(client, user):
+    response = client.post('/token', data={'username': f' {user.email.upper()} ', 'password': user.clean_password})
+
+    assert response.status_code == HTTPStatus.OK
+
+
+@pytest.mark.asyncio
+async def test_token_lookup_uses_the_lower_email_index(session):
+    plan = await session.execute(text('EXPLAIN QUERY PLAN SELECT id FROM users WHERE lower(email) = :email'), {'email': 'a@b.com'})
+
+    assert any('ix_users_email_lower' in row.detail for row in plan)
+
+
+@pytest.mark.asyncio
+async def test_delete_user_not_found(client, session):
+    user_to_delete = await session.scalar(select(User).where(User.id == 1))
     if user_to_delete:
-        session.delete(user_to_delete)
-        session.commit()
+        await session.delete(user_to_delete)
+        await session.commit()
 
     response = client.delete('/users/1')
     assert response.status_code == HTTPStatus.NOT_FOUND
 
 
-def test_update_user_not_found(client, session):
+@pytest.mark.asyncio
+async def test_update_user_not_found(client, session):
     # Limpa o usuário com id=1 antes do teste, se existir
-    user_to_delete = session.scalar(select(User).where(User.id == 1))
+    user_to_delete = await session.scalar(select(User).where(User.id == 1))
     if user_to_delete:
-        session.delete(user_to_delete)
-        session.commit()
+        await session.delete(user_to_delete)
+        await session.commit()
 
     response = client.put(
         '/users/1',
@@ -190,11 +356,11 @@ def test_update_user_not_found(client, session):
     assert response.status_code == HTTPStatus.NOT_FOUND
     assert response.json() == {'detail': 'Usuário não encontrado'}
 
-    def test_get_user_not_found(client, session):
-        user_to_delete = session.scalar(select(User).where(User.id == 1))
+    async def test_get_user_not_found(client, session):
+        user_to_delete = await session.scalar(select(User).where(User.id == 1))
         if user_to_delete:
-            session.delete(user_to_delete)
-            session.commit()
+            await session.delete(user_to_delete)
+            await session.commit()
 
     response = client.get('/users/1')
     assert response.status_code == HTTPStatus.NOT_FOUND
@@ -209,3 +375,78 @@ def test_get_user(client, user):
         'username': user.username,
         'email': user.email,
     }
+
+
+def test_create_users_bulk(client, user, token):
+    response = client.post(
+        '/users/bulk',
+        headers={'Authorization': f'Bearer {token}'},
+        json=[
+            {'username': 'alice', 'email': 'alice@exemplo.com', 'password': '123'},
+            {'username': user.username, 'email': 'novo@exemplo.com', 'password': '123'},
+            {'username': 'bob', 'email': user.email, 'password': '123'},
+            {'username': 'alice', 'email': 'alice2@exemplo.com', 'password': '123'},
+            {'username': 'carol', 'email': 'carol@exemplo.com', 'password': '123'},
+        ],
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert [(r['status'], r['id'], r['detail']) for r in response.json()['results']] == [
+        ('created', 2, None),
+        ('conflict', None, 'Username already exists'),
+        ('conflict', None, 'Email already exists'),
+        ('conflict', None, 'Username already exists'),
+        ('created', 3, None),
+    ]
+
+    response = client.post('/token', data={'username': 'carol@exemplo.com', 'password': '123'})
+    assert response.status_code == HTTPStatus.OK
+
+
+def test_create_users_bulk_too_many(client, token, monkeypatch, settings):
+    monkeypatch.setattr(settings, 'BULK_MAX_USERS', 1)
+    response = client.post(
+        '/users/bulk',
+        headers={'Authorization': f'Bearer {token}'},
+        json=[
+            {'username': 'alice', 'email': 'alice@exemplo.com', 'password': '123'},
+            {'username': 'bob', 'email': 'bob@exemplo.com', 'password': '123'},
+        ],
+    )
+
+    assert response.status_code == HTTPStatus.REQUEST_ENTITY_TOO_LARGE
+
+
+def test_export_users_ndjson(client, user, other_user, token):
+    response = client.get('/users/export', headers={'Authorization': f'Bearer {token}'})
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers['content-type'] == 'application/x-ndjson'
+    assert [json.loads(line) for line in response.text.splitlines()] == [
+        {'id': user.id, 'username': user.username, 'email': user.email},
+        {'id': other_user.id, 'username': other_user.username, 'email': other_user.email},
+    ]
+
+
+def test_export_users_csv(client, user, token):
+    response = client.get('/users/export', params={'format': 'csv'}, headers={'Authorization': f'Bearer {token}'})
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.text.splitlines() == ['id,username,email', f'{user.id},{user.username},{user.email}']
+
+
+@pytest.mark.asyncio
+async def test_token_rehashes_password_with_current_costs(client, session, settings):
+    legacy = Argon2Hasher(time_cost=1, memory_cost=8192, parallelism=1)
+    user = User(username='legacy', email='legacy@test.com', password=legacy.hash('secret'))
+    session.add(user)
+    await session.commit()
+    updated_at = user.updated_at
+
+    response = client.post('/token', data={'username': user.email, 'password': 'secret'})
+    assert response.status_code == HTTPStatus.OK
+
+    await session.refresh(user)
+    assert f'm={settings.ARGON2_MEMORY_COST},t={settings.ARGON2_TIME_COST},p={settings.ARGON2_PARALLELISM}' in user.password
+    assert verify_password('secret', user.password)
+    assert user.updated_at == updated_at
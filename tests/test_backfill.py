@@ -0,0 +1,54 @@
+import pytest
+from sqlalchemy import create_engine, func, insert, select
+
+from fast_zero.backfill import Backfill, backfill_progress, run_backfill
+from fast_zero.models import User, table_registry
+
+TOTAL_USERS = 25
+BATCH_SIZE = 10
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_engine(f'sqlite:///{tmp_path / "backfill.db"}')
+    table_registry.metadata.create_all(engine)
+    with engine.begin() as connection:
+        connection.execute(insert(User), [{'username': f'User{i}', 'email': f'User{i}@Test.com', 'password': 'x'} for i in range(1, TOTAL_USERS + 1)])
+    yield engine
+    engine.dispose()
+
+
+def lowercase_emails():
+    return Backfill('lowercase_emails', User.__table__, {'email': func.lower(User.email)}, where=User.email != func.lower(User.email))
+
+
+def test_backfill_runs_in_batches_with_progress(engine):
+    reports = []
+
+    updated = run_backfill(engine, lowercase_emails(), batch_size=BATCH_SIZE, progress=reports.append)
+
+    assert updated == TOTAL_USERS
+    assert [(report.done, report.total) for report in reports] == [(10, TOTAL_USERS), (20, TOTAL_USERS), (25, TOTAL_USERS)]
+    with engine.connect() as connection:
+        assert connection.scalar(select(func.count()).where(User.email != func.lower(User.email))) == 0
+        assert connection.scalar(select(func.count()).select_from(backfill_progress)) == 0
+
+
+def test_backfill_resumes_after_a_failure(engine):
+    def crash_after_first_batch(report):
+        raise RuntimeError(report.last_id)
+
+    with pytest.raises(RuntimeError):
+        run_backfill(engine, lowercase_emails(), batch_size=BATCH_SIZE, progress=crash_after_first_batch)
+
+    reports = []
+    updated = run_backfill(engine, lowercase_emails(), batch_size=BATCH_SIZE, progress=reports.append)
+
+    assert updated == TOTAL_USERS - BATCH_SIZE
+    assert reports[0].done == BATCH_SIZE * 2
+    assert reports[-1].done == TOTAL_USERS
+
+
+def test_backfill_accepts_a_connection(engine):
+    with engine.connect() as connection:
+        assert run_backfill(connection, lowercase_emails(), progress=None) == TOTAL_USERS
@@ -0,0 +1,250 @@
+import asyncio
+import sqlite3
+import stat
+import time
+from datetime import datetime
+
+import pytest
+import pytest_asyncio
+
+from fast_zero.cache import CacheBackend, RedisClient, TTLCache, cache_errors, cache_evictions, cache_expirations, cache_hits
+from fast_zero.settings import Settings
+
+LOTS_OF_KEYS = 30
+UNREACHABLE_CALLS = 2
+PRIVATE_DIRECTORY = 0o700
+PRIVATE_FILE = 0o600
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache('test-lru', maxsize=2, ttl=60)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')
+    cache.set('c', 3)
+
+    assert cache.get('b') is None
+    assert cache.get('a') == 1
+    assert cache_evictions.value(cache='test-lru') == 1
+
+
+def test_ttl_cache_expires_entries():
+    cache = TTLCache('test-ttl', maxsize=2, ttl=60)
+    cache.set('a', 1, ttl=0.01)
+    time.sleep(0.02)
+
+    assert cache.get('a') is None
+    assert cache.hit_rate() == 0.0
+    assert cache_expirations.value(cache='test-ttl') == 1
+
+
+class FakeRedis:
+    # servidor RESP mínimo no loop do teste, no lugar de um Redis de verdade
+    def __init__(self):
+        self.data = {}
+        self.delay = 0
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                count = int((await reader.readuntil(b'\r\n'))[1:-2])
+                args = []
+                for _ in range(count):
+                    size = int((await reader.readuntil(b'\r\n'))[1:-2])
+                    args.append((await reader.readexactly(size + 2))[:-2])
+                await asyncio.sleep(self.delay)
+                writer.write(self.reply(args[0].decode().upper(), args[1:]))
+                await writer.drain()
+        except asyncio.IncompleteReadError:
+            writer.close()
+
+    def reply(self, command, args):
+        if command == 'GET':
+            value = self.data.get(args[0])
+            return b'$-1\r\n' if value is None else b'$%d\r\n%s\r\n' % (len(value), value)
+        if command == 'SET':
+            self.data[args[0]] = args[1]
+            return b'+OK\r\n'
+        if command == 'DEL':
+            return b':%d\r\n' % sum(self.data.pop(key, None) is not None for key in args)
+        if command == 'EVAL':
+            return self.set_if_generation(*args[2:])
+        if command == 'SCAN':
+            prefix = args[2].rstrip(b'*')
+            keys = [key for key in self.data if key.startswith(prefix)]
+            return b'*2\r\n$1\r\n0\r\n*%d\r\n' % len(keys) + b''.join(b'$%d\r\n%s\r\n' % (len(key), key) for key in keys)
+        return b'-ERR unknown command\r\n'
+
+    def set_if_generation(self, value_key, generation_key, value, _, generation):
+        # só existe um script no cliente: SET_IF_GENERATION
+        if self.data.get(generation_key, b'') != generation:
+            return b'$-1\r\n'
+        self.data[value_key] = value
+        return b'+OK\r\n'
+
+
+@pytest_asyncio.fixture
+async def redis_url():
+    fake = FakeRedis()
+    server = await asyncio.start_server(fake.handle, '127.0.0.1', 0)
+    port = server.sockets[0].getsockname()[1]
+    yield f'redis://127.0.0.1:{port}/0', fake
+    server.close()
+
+
+def shared_backends(tmp_path, redis_url=None):
+    # dois "workers" apontando para o mesmo armazenamento
+    if redis_url:
+        settings = Settings(DATABASE_URL='sqlite://', CACHE_BACKEND='redis', CACHE_URL=redis_url)
+    else:
+        settings = Settings(DATABASE_URL='sqlite://', CACHE_BACKEND='sqlite', CACHE_URL=str(tmp_path / 'cache.db'))
+    return CacheBackend(settings), CacheBackend(settings)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('kind', ['sqlite', 'redis'])
+async def test_shared_backends_see_each_others_writes_and_deletes(tmp_path, redis_url, kind):
+    first, second = shared_backends(tmp_path, redis_url[0] if kind == 'redis' else None)
+    user = {'id': 1, 'email': 'a@b.com', 'updated_at': datetime(2026, 1, 2, 3, 4, 5, 678)}
+    writer, reader = first.cache(f'{kind}-shared', maxsize=10, ttl=60), second.cache(f'{kind}-shared', maxsize=10, ttl=60)
+
+    await writer.set(1, user)
+    assert await reader.get(1) == user
+
+    await writer.delete(1)
+    assert await reader.get(1) is None
+    assert cache_hits.value(cache=f'{kind}-shared') == 1
+    await first.close()
+    await second.close()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('kind', ['memory', 'sqlite', 'redis'])
+async def test_set_after_invalidate_is_dropped(tmp_path, redis_url, kind):
+    if kind == 'memory':
+        first = second = CacheBackend(Settings(DATABASE_URL='sqlite://'))
+        reader = writer = first.cache('memory-generation', maxsize=10, ttl=60)
+    else:
+        first, second = shared_backends(tmp_path, redis_url[0] if kind == 'redis' else None)
+        reader, writer = first.cache(f'{kind}-generation', maxsize=10, ttl=60), second.cache(f'{kind}-generation', maxsize=10, ttl=60)
+
+    # leitura começa antes da escrita e termina depois da invalidação
+    stale = await reader.generation(1)
+    await writer.invalidate(1)
+    await reader.set(1, {'name': 'old'}, generation=stale)
+    assert await reader.get(1) is None
+
+    # leitura que começou depois da invalidação abastece normalmente
+    await reader.set(1, {'name': 'new'}, generation=await reader.generation(1))
+    assert await writer.get(1) == {'name': 'new'}
+    await first.close()
+    await second.close()
+
+
+@pytest.mark.asyncio
+async def test_sqlite_cache_expires_and_prunes(tmp_path):
+    backend, _ = shared_backends(tmp_path)
+    cache = backend.cache('sqlite-prune', maxsize=10, ttl=60)
+    await cache.set('old', 1, ttl=0.01)
+    time.sleep(0.02)
+    assert await cache.get('old') is None
+    assert cache_expirations.value(cache='sqlite-prune') == 1
+
+    for key in range(LOTS_OF_KEYS):
+        await cache.set(key, key)
+
+    assert cache_evictions.value(cache='sqlite-prune') > 0
+    await backend.close()
+
+
+@pytest.mark.asyncio
+async def test_sqlite_cache_waits_for_locks_off_the_event_loop(tmp_path):
+    backend, _ = shared_backends(tmp_path)
+    cache = backend.cache('sqlite-locked', maxsize=10, ttl=60)
+    # outro worker segurando a escrita: o set espera o busy timeout e vira erro
+    lock = sqlite3.connect(tmp_path / 'cache.db', isolation_level=None)
+    lock.execute('BEGIN EXCLUSIVE')
+    ticks = 0
+
+    async def tick():
+        nonlocal ticks
+        while True:
+            ticks += 1
+            await asyncio.sleep(0.001)
+
+    ticker = asyncio.create_task(tick())
+    await cache.set('key', 1)
+    ticker.cancel()
+    lock.rollback()
+    lock.close()
+
+    assert ticks > 1
+    assert cache_errors.value(cache='sqlite-locked') == 1
+    await backend.close()
+
+
+@pytest.mark.asyncio
+async def test_default_sqlite_cache_is_private(tmp_path, monkeypatch):
+    monkeypatch.setenv('XDG_CACHE_HOME', str(tmp_path))
+    backend = CacheBackend(Settings(DATABASE_URL='sqlite://', CACHE_BACKEND='sqlite'))
+    await backend.cache('sqlite-private', maxsize=10, ttl=60).set(1, {'id': 1})
+
+    assert stat.S_IMODE((tmp_path / 'fast_zero').stat().st_mode) == PRIVATE_DIRECTORY
+    assert stat.S_IMODE((tmp_path / 'fast_zero' / 'cache.db').stat().st_mode) == PRIVATE_FILE
+    await backend.close()
+
+
+@pytest.mark.asyncio
+async def test_redis_cache_clear_only_touches_its_namespace(redis_url):
+    url, fake = redis_url
+    backend = CacheBackend(Settings(DATABASE_URL='sqlite://', CACHE_BACKEND='redis', CACHE_URL=url))
+    users, principals = backend.cache('users', maxsize=10, ttl=60), backend.cache('principal', maxsize=10, ttl=60)
+    await users.set(1, {'id': 1})
+    await principals.set('a@b.com', {'id': 1})
+
+    await users.clear()
+
+    assert await users.get(1) is None
+    assert await principals.get('a@b.com') == {'id': 1}
+    assert list(fake.data) == [b'fast_zero:principal:a@b.com']
+    await backend.close()
+
+
+@pytest.mark.asyncio
+async def test_cancelled_redis_call_does_not_leak_its_reply(redis_url):
+    url, fake = redis_url
+    fake.data = {b'a': b'1', b'b': b'2'}
+    client = RedisClient(url, timeout=1)
+    fake.delay = 0.05
+    call = asyncio.create_task(client.execute('GET', 'a'))
+    await asyncio.sleep(0.01)
+    call.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await call
+
+    fake.delay = 0
+    # a resposta atrasada de GET a ficou na conexão antiga
+    assert await client.execute('GET', 'b') == b'2'
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_unreachable_redis_is_a_miss():
+    backend = CacheBackend(Settings(DATABASE_URL='sqlite://', CACHE_BACKEND='redis', CACHE_URL='redis://127.0.0.1:1/0'))
+    cache = backend.cache('redis-down', maxsize=10, ttl=60)
+
+    await cache.set(1, {'id': 1})
+
+    assert await cache.get(1) is None
+    assert cache_errors.value(cache='redis-down') == UNREACHABLE_CALLS
+    await backend.close()
+
+
+@pytest.mark.asyncio
+async def test_unsized_caches_are_off_only_on_the_memory_backend(tmp_path):
+    memory = CacheBackend(Settings(DATABASE_URL='sqlite://', CACHE_BACKEND='memory'))
+    shared, _ = shared_backends(tmp_path)
+
+    assert not memory.cache('principal', maxsize=None, ttl=60).enabled
+    assert shared.cache('principal', maxsize=None, ttl=60).enabled
+    await shared.close()
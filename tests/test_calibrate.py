@@ -0,0 +1,20 @@
+from fast_zero.calibrate import calibrate, write_env
+
+
+def test_calibrate_lowers_memory_when_target_is_unreachable():
+    values = calibrate(target_ms=0.001, memory_cost=4096, parallelism=1, samples=1, min_memory_cost=1024)
+
+    assert values == {'ARGON2_TIME_COST': 1, 'ARGON2_MEMORY_COST': 1024, 'ARGON2_PARALLELISM': 1}
+
+
+def test_write_env_updates_and_appends(tmp_path):
+    env = tmp_path / '.env'
+    env.write_text("DATABASE_URL='sqlite+aiosqlite:///database.db'\nARGON2_TIME_COST=3\n", encoding='utf-8')
+
+    write_env(env, {'ARGON2_TIME_COST': 2, 'ARGON2_MEMORY_COST': 32768})
+
+    assert env.read_text(encoding='utf-8').splitlines() == [
+        "DATABASE_URL='sqlite+aiosqlite:///database.db'",
+        'ARGON2_TIME_COST=2',
+        'ARGON2_MEMORY_COST=32768',
+    ]
@@ -0,0 +1,100 @@
+from datetime import datetime, timedelta, timezone
+from http import HTTPStatus
+
+import pytest
+
+from fast_zero.security import get_current_reader
+
+
+@pytest.fixture
+def changes(client, token, monkeypatch, settings):
+    monkeypatch.setattr(settings, 'CHANGES_LAG_SECONDS', 0)
+    monkeypatch.setattr(settings, 'SQLITE_BUSY_TIMEOUT_MS', 0)
+
+    def pull(**params):
+        response = client.get('/users/changes', params=params, headers={'Authorization': f'Bearer {token}'})
+        assert response.status_code == HTTPStatus.OK
+        return response.json()
+
+    return pull
+
+
+def test_changes_from_the_beginning(changes, user, other_user):
+    feed = changes()
+
+    assert [change['id'] for change in feed['users']] == [user.id, other_user.id]
+    assert feed['users'][0]['updated_at']
+    assert not feed['deleted']
+    assert feed['next_cursor']
+    assert not feed['has_more']
+
+
+def test_changes_after_cursor_bring_updates(client, changes, user, token):
+    cursor = changes()['next_cursor']
+    client.put(
+        f'/users/{user.id}',
+        headers={'Authorization': f'Bearer {token}'},
+        json={'username': 'renomeado', 'email': user.email, 'password': user.clean_password},
+    )
+
+    feed = changes(cursor=cursor)
+
+    assert [change['username'] for change in feed['users']] == ['renomeado']
+    assert not feed['deleted']
+    assert not changes(cursor=feed['next_cursor'])['users']
+    # sem novidades o cursor não anda
+    assert changes(cursor=feed['next_cursor'])['next_cursor'] == feed['next_cursor']
+
+
+def test_changes_after_cursor_bring_tombstones(client, changes, user, token):
+    cursor = changes()['next_cursor']
+    client.delete(f'/users/{user.id}', headers={'Authorization': f'Bearer {token}'})
+
+    # o token do usuário apagado não vale mais: lê o feed sem autenticação
+    client.app.dependency_overrides[get_current_reader] = lambda: None
+    feed = changes(cursor=cursor)
+
+    assert not feed['users']
+    assert [tombstone['id'] for tombstone in feed['deleted']] == [user.id]
+
+
+def test_changes_paginate_with_a_stable_cursor(changes, user, other_user):
+    first = changes(limit=1)
+    second = changes(limit=1, cursor=first['next_cursor'])
+
+    assert [change['id'] for change in first['users']] == [user.id]
+    assert first['has_more']
+    assert [change['id'] for change in second['users']] == [other_user.id]
+    assert not second['has_more']
+
+
+def test_changes_since_a_watermark(changes, user):
+    assert [change['id'] for change in changes(since=(datetime.now(timezone.utc) - timedelta(hours=1)).isoformat())['users']] == [user.id]
+    assert not changes(since=(datetime.now(timezone.utc) + timedelta(hours=1)).isoformat())['users']
+
+
+def test_changes_hold_back_recent_writes(changes, user, monkeypatch, settings):
+    monkeypatch.setattr(settings, 'CHANGES_LAG_SECONDS', 3600)
+
+    assert not changes()['users']
+
+
+def test_changes_wait_out_the_sqlite_lock_timeout(changes, user, monkeypatch, settings):
+    # um commit pode carimbar updated_at e esperar a trava até busy_timeout
+    monkeypatch.setattr(settings, 'SQLITE_BUSY_TIMEOUT_MS', 3_600_000)
+
+    assert not changes()['users']
+
+
+def test_changes_invalid_cursor(client, token):
+    response = client.get('/users/changes', params={'cursor': 'nope'}, headers={'Authorization': f'Bearer {token}'})
+
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert response.json() == {'detail': 'Invalid cursor'}
+
+
+def test_changes_fast_responses_match(changes, user, monkeypatch, settings):
+    validated = changes()
+    monkeypatch.setattr(settings, 'FAST_RESPONSES', True)
+
+    assert changes() == validated
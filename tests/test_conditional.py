@@ -0,0 +1,118 @@
+from http import HTTPStatus
+
+from fast_zero.cache import MemoryCache
+from fast_zero.database import PIN_PRIMARY_COOKIE
+
+
+def test_get_user_sends_validators(client, user):
+    response = client.get(f'/users/{user.id}')
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers['etag'].startswith('"')
+    assert response.headers['last-modified'].endswith('GMT')
+
+
+def test_if_none_match_answers_304_with_one_column_query(client, user, monkeypatch, settings):
+    monkeypatch.setattr(settings, 'DEBUG', True)
+    monkeypatch.setattr(client.app.state, 'read_cache', MemoryCache('users', maxsize=0, ttl=0))
+    etag = client.get(f'/users/{user.id}').headers['etag']
+
+    response = client.get(f'/users/{user.id}', headers={'If-None-Match': etag})
+
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    assert response.headers['etag'] == etag
+    assert response.headers['x-db-query-count'] == '1'
+    assert not response.content
+
+
+def test_if_none_match_does_not_load_the_user(client, user, monkeypatch):
+    monkeypatch.setattr(client.app.state, 'read_cache', MemoryCache('users', maxsize=0, ttl=0))
+    etag = client.get(f'/users/{user.id}').headers['etag']
+
+    async def no_load(*args):
+        raise AssertionError('full row loaded for a 304')
+
+    monkeypatch.setattr(client.app.state.user_loader, 'load', no_load)
+
+    response = client.get(f'/users/{user.id}', headers={'If-None-Match': etag})
+
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+
+
+def test_if_none_match_from_the_read_cache_skips_the_database(client, user, monkeypatch, settings):
+    monkeypatch.setattr(settings, 'DEBUG', True)
+    monkeypatch.setattr(client.app.state, 'read_cache', MemoryCache('users', maxsize=10, ttl=60))
+    etag = client.get(f'/users/{user.id}').headers['etag']
+
+    response = client.get(f'/users/{user.id}', headers={'If-None-Match': etag})
+
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    assert response.headers['x-db-query-count'] == '0'
+
+
+def test_pinned_reads_skip_the_read_cache(client, user, monkeypatch, settings):
+    monkeypatch.setattr(settings, 'DEBUG', True)
+    monkeypatch.setattr(client.app.state, 'read_cache', MemoryCache('users', maxsize=10, ttl=60))
+    client.get(f'/users/{user.id}')
+    client.cookies.set(PIN_PRIMARY_COOKIE, '1')
+
+    response = client.get(f'/users/{user.id}')
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers['x-db-query-count'] == '1'
+
+
+def test_etag_changes_after_update(client, user, token):
+    etag = client.get(f'/users/{user.id}').headers['etag']
+    client.put(
+        f'/users/{user.id}',
+        headers={'Authorization': f'Bearer {token}'},
+        json={'username': 'renomeado', 'email': user.email, 'password': user.clean_password},
+    )
+
+    response = client.get(f'/users/{user.id}', headers={'If-None-Match': etag})
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers['etag'] != etag
+    assert response.json()['username'] == 'renomeado'
+
+
+def test_if_modified_since(client, user):
+    last_modified = client.get(f'/users/{user.id}').headers['last-modified']
+
+    response = client.get(f'/users/{user.id}', headers={'If-Modified-Since': last_modified})
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+
+    response = client.get(f'/users/{user.id}', headers={'If-Modified-Since': 'Mon, 01 Jan 2001 00:00:00 GMT'})
+    assert response.status_code == HTTPStatus.OK
+
+
+def test_conditional_get_of_missing_user(client, user):
+    response = client.get(f'/users/{user.id + 1}', headers={'If-None-Match': '"x"'})
+
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+def test_users_page_etag(client, user, token):
+    headers = {'Authorization': f'Bearer {token}'}
+    response = client.get('/users/', headers=headers)
+    etag = response.headers['etag']
+    assert 'last-modified' not in response.headers
+
+    response = client.get('/users/', headers={**headers, 'If-None-Match': etag})
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+
+    client.post('/users/', json={'username': 'novo', 'email': 'novo@test.com', 'password': 'secret'})
+    response = client.get('/users/', headers={**headers, 'If-None-Match': etag})
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()['users'][-1]['username'] == 'novo'
+
+
+def test_fast_responses_share_validators(client, user, monkeypatch, settings):
+    validated = client.get(f'/users/{user.id}').headers['etag']
+    monkeypatch.setattr(settings, 'FAST_RESPONSES', True)
+
+    response = client.get(f'/users/{user.id}', headers={'If-None-Match': validated})
+
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    assert client.get(f'/users/{user.id}').headers['etag'] == validated
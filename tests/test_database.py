@@ -0,0 +1,110 @@
+from http import HTTPStatus
+
+import pytest
+import pytest_asyncio
+from fastapi.testclient import TestClient
+from sqlalchemy import insert, text
+
+from fast_zero.app import create_app
+from fast_zero.database import PIN_PRIMARY_COOKIE, build_engine
+from fast_zero.models import User, table_registry
+from fast_zero.security import create_access_token
+from fast_zero.settings import Settings
+
+BUSY_TIMEOUT_MS = 1234
+POOL_SIZE = 3
+
+
+@pytest.mark.asyncio
+async def test_build_engine_applies_sqlite_pragmas(tmp_path):
+    settings = Settings(DATABASE_URL=f'sqlite+aiosqlite:///{tmp_path / "test.db"}', SQLITE_BUSY_TIMEOUT_MS=BUSY_TIMEOUT_MS, DB_POOL_SIZE=POOL_SIZE)
+    engine = build_engine(settings)
+
+    async with engine.connect() as conn:
+        journal_mode = await conn.scalar(text('PRAGMA journal_mode'))
+        synchronous = await conn.scalar(text('PRAGMA synchronous'))
+        busy_timeout = await conn.scalar(text('PRAGMA busy_timeout'))
+    await engine.dispose()
+
+    assert journal_mode == 'wal'
+    assert synchronous == 1  # NORMAL
+    assert busy_timeout == BUSY_TIMEOUT_MS
+    assert engine.pool.size() == POOL_SIZE
+
+
+@pytest.mark.asyncio
+async def test_build_engine_in_memory_sqlite():
+    engine = build_engine(Settings(DATABASE_URL='sqlite+aiosqlite:///:memory:'))
+
+    async with engine.connect() as conn:
+        assert await conn.scalar(text('SELECT 1')) == 1
+    await engine.dispose()
+
+
+@pytest_asyncio.fixture
+async def replicated_app(tmp_path):
+    # dois arquivos SQLite com conteúdos diferentes simulam uma réplica atrasada
+    urls = {}
+    for name in ('primary', 'replica'):
+        urls[name] = f'sqlite+aiosqlite:///{tmp_path / name}.db'
+        engine = build_engine(Settings(DATABASE_URL=urls[name]))
+        async with engine.begin() as conn:
+            await conn.run_sync(table_registry.metadata.create_all)
+            await conn.execute(insert(User).values(username=name, email=f'{name}@test.com', password='x'))
+        await engine.dispose()
+
+    return create_app(Settings(DATABASE_URL=urls['primary'], DATABASE_REPLICA_URLS=[urls['replica']], HASH_WORKERS=0))
+
+
+def test_reads_go_to_replica(replicated_app):
+    with TestClient(replicated_app) as client:
+        response = client.get('/users/1')
+
+    assert response.json()['username'] == 'replica'
+
+
+def test_principal_cache_is_not_filled_from_replica(replicated_app):
+    replicated_app.state.settings.USER_CACHE_MAXSIZE = 10
+    token = create_access_token({'sub': 'replica@test.com'})
+
+    with TestClient(replicated_app) as client:
+        response = client.get('/users/', headers={'Authorization': f'Bearer {token}'})
+        cached = client.portal.call(replicated_app.state.user_cache.get, 'replica@test.com')
+
+    assert response.status_code == HTTPStatus.OK
+    assert cached is None
+
+
+def test_reads_after_write_are_pinned_to_primary(replicated_app):
+    with TestClient(replicated_app) as client:
+        response = client.post('/users/', json={'username': 'alice', 'email': 'alice@test.com', 'password': '123'})
+        assert response.status_code == HTTPStatus.CREATED
+        assert PIN_PRIMARY_COOKIE in client.cookies
+
+        response = client.get(f'/users/{response.json()["id"]}')
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()['username'] == 'alice'
+
+
+def test_writes_without_commit_are_not_pinned_to_primary(client, user, token):
+    response = client.post(
+        '/users/bulk',
+        headers={'Authorization': f'Bearer {token}'},
+        json=[{'username': user.username, 'email': 'outro@test.com', 'password': '123'}],
+    )
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()['results'][0]['status'] == 'conflict'
+    assert PIN_PRIMARY_COOKIE not in client.cookies
+
+
+def test_lifespan_builds_and_disposes_state(replicated_app):
+    assert not hasattr(replicated_app.state, 'db')
+
+    with TestClient(replicated_app):
+        router = replicated_app.state.db
+        assert len(router.replicas) == 1
+        assert replicated_app.state.hasher.workers == 0
+
+    assert router.primary.pool.checkedout() == 0
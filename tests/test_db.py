@@ -1,16 +1,18 @@
 from dataclasses import asdict
 
+import pytest
 from sqlalchemy import select
 
 from fast_zero.models import User
 
 
-def test_create_user(session, datetime_fake_vindo_banco):
+@pytest.mark.asyncio
+async def test_create_user(session, datetime_fake_vindo_banco):
     with datetime_fake_vindo_banco(model=User) as time:
         new_user = User(username='test', email='test@test.com', password='secret')
         session.add(new_user)
-        session.commit()
-        user = session.scalar(select(User).where(User.username == 'test'))
+        await session.commit()
+        user = await session.scalar(select(User).where(User.username == 'test'))
     assert asdict(user) == {
         'id': 1,
         'username': 'test',
@@ -0,0 +1,68 @@
+from http import HTTPStatus
+
+import pytest
+from sqlalchemy import event
+
+
+@pytest.fixture
+def statements(session):
+    captured = []
+
+    def capture(conn, cursor, statement, *args):
+        captured.append(statement)
+
+    event.listen(session.bind.sync_engine, 'before_cursor_execute', capture)
+    yield captured
+    event.remove(session.bind.sync_engine, 'before_cursor_execute', capture)
+
+
+def test_get_user_returns_only_requested_fields(client, user):
+    response = client.get(f'/users/{user.id}', params={'fields': 'username'})
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json() == {'username': user.username}
+
+
+def test_get_users_selects_only_requested_columns(client, user, other_user, token, statements):
+    response = client.get('/users/', params={'fields': 'email,id', 'limit': 1}, headers={'Authorization': f'Bearer {token}'})
+
+    assert response.json()['users'] == [{'id': user.id, 'email': user.email}]
+    page_query = statements[-1]
+    assert 'users.username' not in page_query
+    assert 'users.password' not in page_query
+
+    response = client.get(
+        '/users/', params={'fields': 'email', 'cursor': response.json()['next_cursor']}, headers={'Authorization': f'Bearer {token}'}
+    )
+    assert response.json()['users'] == [{'email': other_user.email}]
+
+
+def test_fields_are_part_of_the_etag(client, user):
+    full = client.get(f'/users/{user.id}').headers['etag']
+    sparse = client.get(f'/users/{user.id}', params={'fields': 'email'}).headers['etag']
+
+    assert full != sparse
+    assert client.get(f'/users/{user.id}', params={'fields': 'id,username,email'}).headers['etag'] == full
+
+    response = client.get(f'/users/{user.id}', params={'fields': 'email'}, headers={'If-None-Match': sparse})
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+    response = client.get(f'/users/{user.id}', headers={'If-None-Match': sparse})
+    assert response.status_code == HTTPStatus.OK
+
+
+def test_fields_on_the_fast_path(client, user, token, monkeypatch, settings):
+    headers = {'Authorization': f'Bearer {token}'}
+    validated = client.get('/users/', params={'fields': 'username'}, headers=headers)
+    monkeypatch.setattr(settings, 'FAST_RESPONSES', True)
+
+    fast = client.get('/users/', params={'fields': 'username'}, headers=headers)
+
+    assert fast.json() == validated.json() == {'users': [{'username': user.username}], 'next_cursor': None, 'total': None}
+    assert fast.headers['etag'] == validated.headers['etag']
+
+
+@pytest.mark.parametrize('fields', ['password', 'id,created_at', ''])
+def test_unknown_fields_are_rejected(client, user, fields):
+    response = client.get(f'/users/{user.id}', params={'fields': fields})
+
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
@@ -0,0 +1,71 @@
+from http import HTTPStatus
+
+import pytest
+from fastapi import HTTPException
+
+from fast_zero.hashing import HashingExecutor, hash_latency, hash_rejected, verify_password
+from fast_zero.metrics import render_metrics
+
+CHEAP_COSTS = (1, 1024, 1)
+
+
+@pytest.mark.asyncio
+async def test_hashing_executor_process_pool():
+    executor = HashingExecutor(workers=1, queue_size=1)
+    try:
+        hashed = await executor.hash('secret')
+        assert await executor.verify('secret', hashed)
+        assert not await executor.verify('wrong', hashed)
+    finally:
+        executor.shutdown()
+
+    assert executor.pending == 0
+    assert hash_latency.value(operation='hash')['count'] >= 1
+    assert 'fast_zero_hash_seconds_bucket{operation="verify",le="+Inf"}' in render_metrics()
+
+
+@pytest.mark.asyncio
+async def test_hashing_executor_rejects_when_queue_is_full():
+    executor = HashingExecutor(workers=0, queue_size=0)
+    executor.pending = executor.max_pending
+    rejected = hash_rejected.value()
+
+    with pytest.raises(HTTPException) as exc:
+        await executor.hash('secret')
+
+    assert exc.value.status_code == HTTPStatus.SERVICE_UNAVAILABLE
+    assert hash_rejected.value() == rejected + 1
+
+
+@pytest.mark.asyncio
+async def test_hash_many_submits_small_chunks(monkeypatch):
+    executor = HashingExecutor(workers=2, queue_size=0, costs=CHEAP_COSTS, chunk_size=2)
+    # threadpool do loop no lugar dos processos: o que importa aqui é como os lotes saem
+    monkeypatch.setattr(executor, '_executor', lambda: None)
+    chunks, in_flight = [], []
+    run = executor._run
+
+    async def tracking_run(operation, func, passwords):
+        chunks.append(len(passwords))
+        in_flight.append(executor.pending + 1)
+        return await run(operation, func, passwords)
+
+    monkeypatch.setattr(executor, '_run', tracking_run)
+
+    passwords = [f'secret{i}' for i in range(5)]
+    hashes = await executor.hash_many(passwords)
+
+    assert sorted(chunks) == [1, 2, 2]
+    assert max(in_flight) == executor.workers
+    assert all(verify_password(password, hashed, CHEAP_COSTS) for password, hashed in zip(passwords, hashes))
+
+
+@pytest.mark.asyncio
+async def test_hash_many_is_rejected_when_queue_is_full():
+    executor = HashingExecutor(workers=0, queue_size=0, costs=CHEAP_COSTS)
+    executor.pending = executor.max_pending
+
+    with pytest.raises(HTTPException) as exc:
+        await executor.hash_many(['secret'] * 40)
+
+    assert exc.value.status_code == HTTPStatus.SERVICE_UNAVAILABLE
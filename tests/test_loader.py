@@ -0,0 +1,131 @@
+import asyncio
+from http import HTTPStatus
+
+import pytest
+
+from fast_zero.cache import MemoryCache
+from fast_zero.loader import UserLoader
+from fast_zero.querylog import QueryStats, current_stats
+
+SEPARATE_QUERIES = 2
+
+
+def test_batch_returns_users_in_requested_order(client, user, other_user):
+    missing = max(user.id, other_user.id) + 1
+
+    response = client.get('/users/batch', params={'ids': [other_user.id, missing, user.id, other_user.id]})
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.json() == {
+        'users': [
+            {'id': other_user.id, 'username': other_user.username, 'email': other_user.email},
+            {'id': user.id, 'username': user.username, 'email': user.email},
+        ],
+        'missing': [missing],
+    }
+
+
+def test_batch_is_one_query(client, user, other_user, monkeypatch, settings):
+    monkeypatch.setattr(settings, 'DEBUG', True)
+
+    response = client.get('/users/batch', params={'ids': f'{user.id},{other_user.id}'})
+
+    assert [row['id'] for row in response.json()['users']] == [user.id, other_user.id]
+    assert response.headers['x-db-query-count'] == '1'
+
+
+def test_batch_fast_responses(client, user, monkeypatch, settings):
+    monkeypatch.setattr(settings, 'FAST_RESPONSES', True)
+
+    response = client.get('/users/batch', params={'ids': user.id})
+
+    assert response.json() == {'users': [{'id': user.id, 'username': user.username, 'email': user.email}], 'missing': []}
+
+
+def test_batch_limits_ids(client, monkeypatch, settings):
+    max_ids = 2
+    monkeypatch.setattr(settings, 'BATCH_MAX_IDS', max_ids)
+
+    response = client.get('/users/batch', params={'ids': '1,2,3'})
+
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+    assert response.json() == {'detail': f'At most {max_ids} ids per request'}
+
+
+@pytest.mark.parametrize('ids', ['', 'abc'])
+def test_batch_rejects_bad_ids(client, ids):
+    response = client.get('/users/batch', params={'ids': ids})
+
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+
+@pytest.mark.asyncio
+async def test_concurrent_loads_share_one_query(session, user, other_user):
+    loader = UserLoader(window=0.001)
+    stats = QueryStats()
+    current_stats.set(stats)
+    missing = max(user.id, other_user.id) + 1
+
+    results = await asyncio.gather(*(loader.load(session.bind, user_id) for user_id in (user.id, other_user.id, user.id, missing)))
+    rows = [row for row, _ in results]
+
+    assert stats.count == 1
+    assert [row.username for row in rows[:3]] == [user.username, other_user.username, user.username]
+    assert rows[0] is rows[2]
+    assert rows[3] is None
+
+
+@pytest.mark.asyncio
+async def test_loads_after_the_window_query_again(session, user):
+    loader = UserLoader(window=0)
+    stats = QueryStats()
+    current_stats.set(stats)
+
+    await loader.load(session.bind, user.id)
+    await loader.load(session.bind, user.id)
+
+    assert stats.count == SEPARATE_QUERIES
+
+
+@pytest.mark.asyncio
+async def test_full_batches_are_split(session, user, other_user):
+    loader = UserLoader(window=0.001, max_batch=1)
+    stats = QueryStats()
+    current_stats.set(stats)
+
+    await asyncio.gather(loader.load(session.bind, user.id), loader.load(session.bind, other_user.id))
+
+    assert stats.count == SEPARATE_QUERIES
+
+
+@pytest.mark.asyncio
+async def test_fresh_loads_do_not_join_a_running_query(session, user):
+    loader = UserLoader(window=0)
+    cache = MemoryCache('users', maxsize=10, ttl=60)
+    started, release = asyncio.Event(), asyncio.Event()
+    generation = cache.generation
+
+    async def held_generation(key):
+        # o primeiro lote fica em andamento (já fora da janela) até o teste liberar
+        value = await generation(key)
+        if not started.is_set():
+            started.set()
+            await release.wait()
+        return value
+
+    cache.generation = held_generation
+    stats = QueryStats()
+    current_stats.set(stats)
+
+    first = asyncio.create_task(loader.load(session.bind, user.id, cache=cache, fresh=True))
+    await started.wait()
+    await cache.invalidate(user.id)  # escrita commitada com o primeiro lote já em andamento
+    joined = asyncio.create_task(loader.load(session.bind, user.id))
+    second = asyncio.create_task(loader.load(session.bind, user.id, cache=cache, fresh=True))
+    await asyncio.sleep(0.01)
+    release.set()
+    (_, stale), (_, shared), (_, current) = await asyncio.gather(first, joined, second)
+
+    assert stats.count == SEPARATE_QUERIES
+    assert shared == stale != current
+    assert current == await cache.generation(user.id)
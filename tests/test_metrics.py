@@ -0,0 +1,53 @@
+from http import HTTPStatus
+
+import pytest
+from sqlalchemy import text
+
+from fast_zero.database import build_engine, pool_checked_out, pool_checkout_seconds, pool_wait_seconds
+from fast_zero.metrics import Counter, Histogram, http_requests
+from fast_zero.settings import Settings
+
+
+def test_metrics_endpoint_reports_route_templates(client, user):
+    requests = http_requests.value(method='GET', route='/users/{user_id}', status=200)
+    client.get(f'/users/{user.id}')
+
+    response = client.get('/metrics')
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers['content-type'].startswith('text/plain; version=0.0.4')
+    assert http_requests.value(method='GET', route='/users/{user_id}', status=200) == requests + 1
+    assert 'fast_zero_http_request_seconds_bucket{method="GET",route="/users/{user_id}",status="200",le="0.005"}' in response.text
+    assert 'fast_zero_http_requests_in_flight 1' in response.text  # o próprio GET /metrics
+
+
+def test_histogram_and_counter_render():
+    counter = Counter('test_events_total', 'Events.', ('kind',))
+    histogram = Histogram('test_duration_seconds', 'Duration.', buckets=(0.1, 1.0))
+    counter.inc(kind='a"b')
+    histogram.observe(0.1)
+    histogram.observe(5)
+
+    assert 'test_events_total{kind="a\\"b"} 1' in counter.render()
+    assert histogram.render().splitlines()[2:] == [
+        'test_duration_seconds_bucket{le="0.1"} 1',
+        'test_duration_seconds_bucket{le="1.0"} 1',
+        'test_duration_seconds_bucket{le="+Inf"} 2',
+        'test_duration_seconds_count 2',
+        'test_duration_seconds_sum 5.1',
+    ]
+
+
+@pytest.mark.asyncio
+async def test_pool_events_are_tracked(tmp_path):
+    engine = build_engine(Settings(DATABASE_URL=f'sqlite+aiosqlite:///{tmp_path / "pool.db"}'))
+    waits = pool_wait_seconds.value()['count']
+    checkouts = pool_checkout_seconds.value()['count']
+
+    async with engine.connect() as conn:
+        await conn.execute(text('SELECT 1'))
+        assert pool_checked_out.value() >= 1
+    await engine.dispose()
+
+    assert pool_wait_seconds.value()['count'] == waits + 1
+    assert pool_checkout_seconds.value()['count'] == checkouts + 1
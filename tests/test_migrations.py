@@ -0,0 +1,110 @@
+import sqlite3
+from http import HTTPStatus
+from pathlib import Path
+
+import pytest
+import pytest_asyncio
+from alembic import command
+from alembic.config import Config
+from fastapi.testclient import TestClient
+from pwdlib.hashers.argon2 import Argon2Hasher
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from fast_zero.app import create_app
+from fast_zero.changes import decode_position, read_changes
+from fast_zero.settings import Settings
+
+LEGACY_USERS = 7
+# o trigger criado à mão que segue no database.db do repositório
+UPDATE_TIMESTAMP_TRIGGER = """CREATE TRIGGER update_timestamp AFTER UPDATE ON users FOR EACH ROW BEGIN
+    UPDATE users SET updated_at = CURRENT_TIMESTAMP WHERE id = OLD.id;
+END"""
+
+
+def alembic_config():
+    return Config(Path(__file__).parents[1] / 'alembic.ini')
+
+
+@pytest.fixture
+def legacy_database(tmp_path, monkeypatch):
+    # banco parado em d0f27ff5b760, com o trigger e datas do CURRENT_TIMESTAMP, todas no mesmo segundo
+    path = tmp_path / 'legacy.db'
+    monkeypatch.setenv('DATABASE_URL', f'sqlite+aiosqlite:///{path}')
+    command.upgrade(alembic_config(), 'd0f27ff5b760')
+    with sqlite3.connect(path) as connection:
+        connection.execute(UPDATE_TIMESTAMP_TRIGGER)
+        connection.executemany(
+            "INSERT INTO users (username, email, password, created_at, updated_at) VALUES (?, ?, 'x', '2025-06-13 12:00:00', '2025-06-13 12:00:00')",
+            [(f'user{i}', f'user{i}@test.com') for i in range(1, LEGACY_USERS + 1)],
+        )
+    return path
+
+
+@pytest.fixture
+def migrated_database(legacy_database):
+    command.upgrade(alembic_config(), 'head')
+    return legacy_database
+
+
+@pytest_asyncio.fixture
+async def migrated_session(migrated_database):
+    engine = create_async_engine(f'sqlite+aiosqlite:///{migrated_database}')
+    async with AsyncSession(engine) as session:
+        yield session
+    await engine.dispose()
+
+
+def test_upgrade_drops_the_legacy_trigger(migrated_database):
+    with sqlite3.connect(migrated_database) as connection:
+        triggers = connection.execute("SELECT name FROM sqlite_master WHERE type = 'trigger' AND name = 'update_timestamp'").fetchall()
+        updated_at = {row[0] for row in connection.execute('SELECT updated_at FROM users')}
+
+    assert triggers == []
+    # o backfill completou a fração sem o trigger reescrever a data original
+    assert updated_at == {'2025-06-13 12:00:00.000000'}
+
+
+def test_upgrade_repairs_databases_migrated_with_the_trigger(legacy_database):
+    # banco que passou de ca5821bad3c3 antes dela remover o trigger, que seguiu reescrevendo updated_at
+    command.upgrade(alembic_config(), 'f1c9a4e7b382')
+    with sqlite3.connect(legacy_database) as connection:
+        connection.execute(UPDATE_TIMESTAMP_TRIGGER)
+        connection.execute("UPDATE users SET username = 'renamed' WHERE id = 1")
+
+    command.upgrade(alembic_config(), 'head')
+
+    with sqlite3.connect(legacy_database) as connection:
+        assert connection.execute("SELECT count(*) FROM sqlite_master WHERE type = 'trigger' AND name = 'update_timestamp'").fetchone() == (0,)
+        assert connection.execute('SELECT count(*) FROM users WHERE length(updated_at) = 19').fetchone() == (0,)
+
+
+@pytest.mark.asyncio
+async def test_changes_feed_pages_every_migrated_user(migrated_session):
+    seen, position = [], None
+    while True:
+        changes = await read_changes(migrated_session, position, limit=1, lag=0)
+        seen += [user['id'] for user in changes['users']]
+        if not changes['has_more']:
+            break
+        position = decode_position(changes['next_cursor'])
+
+    assert seen == list(range(1, LEGACY_USERS + 1))
+
+
+def test_login_rehash_keeps_updated_at_on_a_migrated_database(migrated_database):
+    legacy = Argon2Hasher(time_cost=1, memory_cost=8192, parallelism=1)
+    with sqlite3.connect(migrated_database) as connection:
+        connection.execute('UPDATE users SET password = ? WHERE id = 1', (legacy.hash('secret'),))
+        before = connection.execute('SELECT password, updated_at FROM users WHERE id = 1').fetchone()
+
+    settings = Settings(
+        DATABASE_URL=f'sqlite+aiosqlite:///{migrated_database}', HASH_WORKERS=0, ARGON2_TIME_COST=1, ARGON2_MEMORY_COST=1024, ARGON2_PARALLELISM=1
+    )
+    with TestClient(create_app(settings)) as client:
+        response = client.post('/token', data={'username': 'user1@test.com', 'password': 'secret'})
+    assert response.status_code == HTTPStatus.OK
+
+    with sqlite3.connect(migrated_database) as connection:
+        password, updated_at = connection.execute('SELECT password, updated_at FROM users WHERE id = 1').fetchone()
+    assert password != before[0]
+    assert updated_at == before[1]
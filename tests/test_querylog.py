@@ -0,0 +1,97 @@
+import logging
+from http import HTTPStatus
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from fast_zero.database import build_engine
+from fast_zero.querylog import redact
+from fast_zero.settings import Settings
+
+
+def test_debug_mode_reports_queries_per_request(client, user, monkeypatch, settings):
+    monkeypatch.setattr(settings, 'DEBUG', True)
+
+    response = client.get(f'/users/{user.id}')
+
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers['x-db-query-count'] == '1'
+    assert float(response.headers['x-db-query-time-ms']) >= 0
+
+
+def test_query_headers_are_off_by_default(client, user):
+    response = client.get(f'/users/{user.id}')
+
+    assert 'x-db-query-count' not in response.headers
+
+
+@pytest.mark.asyncio
+async def test_slow_queries_are_logged_without_parameters(caplog):
+    engine = build_engine(Settings(DATABASE_URL='sqlite+aiosqlite:///:memory:', SLOW_QUERY_MS=0))
+
+    with caplog.at_level(logging.WARNING, logger='fast_zero.sql'):
+        async with engine.connect() as conn:
+            await conn.execute(text('SELECT :email'), {'email': 'segredo@test.com'})
+    await engine.dispose()
+
+    assert 'slow query' in caplog.text
+    assert 'SELECT ?' in caplog.text
+    assert "params=['?']" in caplog.text
+    assert 'segredo' not in caplog.text
+
+
+@pytest.mark.asyncio
+async def test_failed_queries_leave_no_start_time_behind():
+    engine = build_engine(Settings(DATABASE_URL='sqlite+aiosqlite:///:memory:'))
+
+    async with engine.connect() as conn:
+        with pytest.raises(OperationalError):
+            await conn.execute(text('SELECT * FROM nao_existe'))
+        await conn.execute(text('SELECT 1'))
+        started_at = conn.sync_connection.info['query_started_at']
+    await engine.dispose()
+
+    assert started_at == []
+
+
+def test_redact_executemany():
+    assert redact([('a', 'b'), ('c', 'd')], executemany=True) == '<2 rows>'
+    assert redact({'email': 'x@y.com'}, executemany=False) == {'email': '?'}
+
+
+def test_create_user_is_a_single_statement(client, monkeypatch, settings):
+    monkeypatch.setattr(settings, 'DEBUG', True)
+
+    response = client.post('/users/', json={'username': 'novo', 'email': 'novo@test.com', 'password': 'secret'})
+
+    assert response.status_code == HTTPStatus.CREATED
+    assert response.headers['x-db-query-count'] == '1'
+
+
+def test_update_and_delete_skip_extra_round_trips(client, user, token, monkeypatch, settings):
+    monkeypatch.setattr(settings, 'DEBUG', True)
+    headers = {'Authorization': f'Bearer {token}'}
+    payload = {'username': 'renomeado', 'email': user.email, 'password': 'nova'}
+
+    # autenticação (1) + UPDATE/DELETE ... RETURNING (1)
+    response = client.put(f'/users/{user.id}', headers=headers, json=payload)
+    assert response.status_code == HTTPStatus.OK
+    assert response.json()['username'] == 'renomeado'
+    assert response.headers['x-db-query-count'] == '2'
+
+    # ... + tombstone do /users/changes
+    response = client.delete(f'/users/{user.id}', headers=headers)
+    assert response.status_code == HTTPStatus.OK
+    assert response.headers['x-db-query-count'] == '3'
+
+
+def test_total_is_read_from_the_counts_table(client, user, token, monkeypatch, settings):
+    monkeypatch.setattr(settings, 'DEBUG', True)
+    headers = {'Authorization': f'Bearer {token}'}
+
+    response = client.get('/users/', params={'include_total': True}, headers=headers)
+
+    assert response.json()['total'] == 1
+    # autenticação + total + página
+    assert response.headers['x-db-query-count'] == '3'
@@ -0,0 +1,105 @@
+from http import HTTPStatus
+
+from fastapi import HTTPException
+
+from fast_zero.cache import TTLCache
+from fast_zero.ratelimit import LoginThrottle, login_throttled
+
+BASE_SECONDS = 10
+
+
+def test_token_is_throttled_before_hashing(client, user, monkeypatch, settings):
+    for _ in range(settings.LOGIN_MAX_FAILURES_PER_EMAIL):
+        response = client.post('/token', data={'username': user.email, 'password': 'wrong'})
+        assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+    async def no_hashing(*args):
+        raise AssertionError('hash executed for a throttled login')
+
+    monkeypatch.setattr(client.app.state.hasher, 'verify_and_update', no_hashing)
+    throttled = login_throttled.value()
+
+    response = client.post('/token', data={'username': user.email.upper(), 'password': user.clean_password})
+
+    assert response.status_code == HTTPStatus.TOO_MANY_REQUESTS
+    assert int(response.headers['retry-after']) > 0
+    assert login_throttled.value() == throttled + 1
+
+
+def test_successful_login_resets_email_failures(client, user, settings):
+    for _ in range(settings.LOGIN_MAX_FAILURES_PER_EMAIL - 1):
+        client.post('/token', data={'username': user.email, 'password': 'wrong'})
+    client.post('/token', data={'username': user.email, 'password': user.clean_password})
+
+    response = client.post('/token', data={'username': user.email, 'password': 'wrong'})
+
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+
+def test_interrupted_attempts_give_their_reservation_back(client, user, monkeypatch, settings):
+    async def busy(*args):
+        raise HTTPException(status_code=HTTPStatus.SERVICE_UNAVAILABLE, detail='Server busy, try again later')
+
+    with monkeypatch.context() as patch:
+        patch.setattr(client.app.state.hasher, 'verify_and_update', busy)
+        for _ in range(settings.LOGIN_MAX_FAILURES_PER_EMAIL):
+            response = client.post('/token', data={'username': user.email, 'password': user.clean_password})
+            assert response.status_code == HTTPStatus.SERVICE_UNAVAILABLE
+
+    response = client.post('/token', data={'username': user.email, 'password': user.clean_password})
+
+    assert response.status_code == HTTPStatus.OK
+
+
+def build_throttle():
+    return LoginThrottle(TTLCache('test-throttle', maxsize=10, ttl=60), window=60, backoff_base=BASE_SECONDS, backoff_max=1000)
+
+
+def fail(throttle, keys):
+    assert throttle.reserve(keys) == 0
+    throttle.failure(keys)
+
+
+def test_backoff_grows_exponentially():
+    throttle = build_throttle()
+    keys = {'email:a@b.com': 2}
+
+    fail(throttle, keys)
+    fail(throttle, keys)
+    assert throttle.reserve(keys) == BASE_SECONDS
+
+    throttle.storage.get('email:a@b.com')['blocked_until'] = 0  # bloqueio expirou
+    fail(throttle, keys)
+    fail(throttle, keys)
+    assert throttle.reserve(keys) == BASE_SECONDS * 2
+
+
+def test_concurrent_attempts_cannot_exceed_the_limit():
+    throttle = build_throttle()
+    keys = {'email:a@b.com': 2}
+
+    # rajada: nenhuma tentativa terminou a verificação ainda
+    assert [throttle.reserve(keys) for _ in range(3)] == [0, 0, 1]
+
+
+def test_success_keeps_other_ip_failures():
+    throttle = build_throttle()
+    keys = {'email:a@b.com': 5, 'ip:10.0.0.1': 3}
+    fail(throttle, {'email:c@d.com': 5, 'ip:10.0.0.1': 3})
+
+    assert throttle.reserve(keys) == 0
+    throttle.success(keys)
+
+    assert throttle.storage.get('email:a@b.com') is None
+    assert len(throttle.storage.get('ip:10.0.0.1')['failures']) == 1
+
+
+def test_release_keeps_earlier_failures():
+    throttle = build_throttle()
+    keys = {'email:a@b.com': 5}
+    fail(throttle, keys)
+
+    assert throttle.reserve(keys) == 0
+    throttle.release(keys)
+
+    assert len(throttle.storage.get('email:a@b.com')['failures']) == 1
@@ -0,0 +1,81 @@
+from http import HTTPStatus
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import select
+
+from fast_zero.models import User
+from fast_zero.search import search_users
+
+
+@pytest.fixture
+def search(client, token):
+    def run(q, **params):
+        response = client.get('/users/search', params={'q': q, **params}, headers={'Authorization': f'Bearer {token}'})
+        assert response.status_code == HTTPStatus.OK
+        return [user['username'] for user in response.json()['users']]
+
+    return run
+
+
+@pytest_asyncio.fixture
+async def people(session):
+    session.add_all([
+        User(username='marina', email='marina@empresa.com', password='x'),
+        User(username='mar', email='mar@praia.com', password='x'),
+        User(username='joaquim', email='jq@marinha.mil', password='x'),
+        User(username='pedro', email='pedro@test.com', password='x'),
+    ])
+    await session.commit()
+
+
+@pytest.mark.usefixtures('people')
+def test_search_ranks_exact_then_prefix_then_substring(search):
+    assert search('mar') == ['mar', 'marina', 'joaquim']
+
+
+@pytest.mark.usefixtures('people')
+def test_search_matches_substrings_case_insensitively(search):
+    assert search('PRAIA') == ['mar']
+    assert search('quim') == ['joaquim']
+
+
+@pytest.mark.usefixtures('people')
+def test_search_short_terms_fall_back_to_like(search):
+    assert search('pe') == ['pedro']
+
+
+@pytest.mark.usefixtures('people')
+def test_search_paginates(search):
+    assert search('mar', limit=1, offset=1) == ['marina']
+
+
+@pytest.mark.usefixtures('people')
+def test_search_treats_fts_syntax_as_text(search):
+    assert not search('mar" OR "pedro')
+    assert not search('100%_')
+
+
+@pytest.mark.asyncio
+@pytest.mark.usefixtures('people')
+async def test_search_index_follows_update_and_delete(client, session, search, user, token):
+    headers = {'Authorization': f'Bearer {token}'}
+    client.put(f'/users/{user.id}', headers=headers, json={'username': 'renomeado', 'email': user.email, 'password': 'x'})
+    assert search('renome') == ['renomeado']
+    assert not search('Teste')
+
+    # depois do DELETE o token não vale mais: consulta o índice direto
+    client.delete(f'/users/{user.id}', headers=headers)
+    assert not (await session.scalars(search_users(select(User.username), 'renome', dialect='sqlite'))).all()
+
+
+def test_search_requires_a_term(client, token):
+    response = client.get('/users/search', params={'q': ''}, headers={'Authorization': f'Bearer {token}'})
+
+    assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY
+
+
+def test_search_without_fts_uses_like():
+    query = search_users(select(User), 'marina', dialect='postgresql')
+
+    assert 'users_fts' not in str(query)
@@ -1,10 +1,19 @@
 from http import HTTPStatus
 
+import pytest
 from jwt import decode
 
+from fast_zero.cache import cache_hits
 from fast_zero.security import ALGORITHM, SECRET_KEY, create_access_token
 
 
+@pytest.fixture
+def settings(settings):
+    # o cache do principal fica desligado por padrão no backend memory
+    settings.USER_CACHE_MAXSIZE = 10
+    return settings
+
+
 def test_jwt():
     data = {'test': 'test'}
     token = create_access_token(data)
@@ -18,3 +27,49 @@ def test_jwt_invalid_token(client):
     response = client.delete('/users/1', headers={'Authorization': 'Bearer token-invalido'})
     assert response.status_code == HTTPStatus.ANAUTHORIZED
     assert response.json() == {'detail': 'Could not validate credentials'}
+
+
+def test_get_current_user_uses_principal_cache(client, user, token):
+    hits = cache_hits.value(cache='principal')
+
+    client.get('/users/', headers={'Authorization': f'Bearer {token}'})
+    response = client.get('/users/', headers={'Authorization': f'Bearer {token}'})
+
+    assert response.status_code == HTTPStatus.OK
+    assert cache_hits.value(cache='principal') == hits + 1
+    cached = client.portal.call(client.app.state.user_cache.get, user.email)
+    assert cached['id'] == user.id
+    assert 'password' not in cached
+
+
+def test_update_user_invalidates_principal_cache(client, user, token):
+    client.get('/users/', headers={'Authorization': f'Bearer {token}'})
+    client.put(
+        f'/users/{user.id}',
+        headers={'Authorization': f'Bearer {token}'},
+        json={'username': 'Maria', 'email': 'maria@gmail.com', 'password': '123'},
+    )
+
+    response = client.get('/users/', headers={'Authorization': f'Bearer {token}'})
+
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+
+def test_delete_user_invalidates_principal_cache(client, user, token):
+    client.get('/users/', headers={'Authorization': f'Bearer {token}'})
+    client.delete(f'/users/{user.id}', headers={'Authorization': f'Bearer {token}'})
+
+    response = client.get('/users/', headers={'Authorization': f'Bearer {token}'})
+
+    assert response.status_code == HTTPStatus.UNAUTHORIZED
+
+
+def test_get_current_user_reuses_verified_token(client, user, token):
+    hits = cache_hits.value(cache='token')
+
+    client.get('/users/', headers={'Authorization': f'Bearer {token}'})
+    response = client.get('/users/', headers={'Authorization': f'Bearer {token}'})
+
+    assert response.status_code == HTTPStatus.OK
+    assert cache_hits.value(cache='token') == hits + 1
+    assert len(client.app.state.token_cache) == 1